@@ -0,0 +1,172 @@
+"Batch conversion of chart files to SVG using a pool of worker processes."
+
+import concurrent.futures
+import glob
+import os
+import pathlib
+import time
+from dataclasses import dataclass
+
+import cache
+import chart
+import constants
+import schema
+
+# The suffixes of the chart files found when a directory is given. JSON files
+# are not included, since these are often schemas; give them explicitly instead.
+SUFFIXES = (".yaml", ".yml")
+
+
+@dataclass
+class Result:
+    "The outcome of converting one chart file."
+
+    infilepath: str
+    outfilepath: str
+    elapsed: float
+    error: str = None
+
+
+def find_files(patterns):
+    """Return the sorted list of chart files given by the file paths,
+    directories (searched recursively) and glob patterns.
+    Any pattern matching nothing is returned as is, so that it is reported.
+    """
+    result = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for dirpath, dirnames, filenames in os.walk(pattern):
+                result.update(
+                    os.path.join(dirpath, filename)
+                    for filename in filenames
+                    if os.path.splitext(filename)[1].lower() in SUFFIXES
+                )
+        elif glob.has_magic(pattern):
+            result.update(glob.glob(pattern, recursive=True))
+        else:
+            result.add(pattern)
+    return sorted(result)
+
+
+def get_outfilepath(infilepath, outdirpath=None, compress=False, basedirpath=None):
+    """Return the path of the SVG file for the chart file. If 'outdirpath' is
+    given, the path of the chart file relative to 'basedirpath', by default
+    its own directory, is mirrored in it.
+    """
+    result = pathlib.Path(infilepath).with_suffix(".svgz" if compress else ".svg")
+    if outdirpath:
+        if basedirpath:
+            relpath = os.path.relpath(os.path.abspath(result), basedirpath)
+        else:
+            relpath = result.name
+        result = pathlib.Path(outdirpath) / relpath
+    return str(result)
+
+
+def get_outfilepaths(infilepaths, outdirpath=None, compress=False):
+    """Return the list of paths of the SVG files for the chart files. If
+    'outdirpath' is given, the directory structure of the chart files below
+    their common directory is mirrored in it, and its subdirectories created.
+    Raises ValueError if two chart files would be written to the same SVG file.
+    """
+    basedirpath = None
+    if outdirpath and infilepaths:
+        basedirpath = os.path.commonpath(
+            [os.path.dirname(os.path.abspath(p)) for p in infilepaths]
+        )
+    result = [
+        get_outfilepath(infilepath, outdirpath, compress, basedirpath)
+        for infilepath in infilepaths
+    ]
+    seen = {}
+    for infilepath, outfilepath in zip(infilepaths, result):
+        key = os.path.normcase(os.path.abspath(outfilepath))
+        if key in seen:
+            raise ValueError(
+                f"'{seen[key]}' and '{infilepath}' would both be written"
+                f" to '{outfilepath}'"
+            )
+        seen[key] = infilepath
+    if outdirpath:
+        for dirpath in set(os.path.dirname(outfilepath) for outfilepath in result):
+            os.makedirs(dirpath, exist_ok=True)
+    return result
+
+
+def warm():
+    """Import all chart classes and compile their schema validators,
+    so that each worker process pays for this once, not for each file.
+    """
+    for name in constants.CHARTS:
+        schema.get_validator(chart.get_chart_class(name).SCHEMA)
+
+
+def get_cache(cachedirpath):
+    "Return the on-disk cache of SVG code in the directory, or None if not given."
+    if not cachedirpath:
+        return None
+    return cache.DiskCache(
+        cachedirpath, maxsize=constants.RENDER_CACHE_SIZE, suffix=".svg"
+    )
+
+
+def convert(
+    infilepath,
+    outfilepath,
+    indent=2,
+    minify=False,
+    compress=False,
+    cachedirpath=None,
+):
+    """Read the chart file, render it and write the SVG file. If 'cachedirpath'
+    is given, the SVG code is cached on disk in that directory.
+    Never raises; any error is recorded in the returned Result.
+    """
+    start = time.perf_counter()
+    try:
+        chart.retrieve(infilepath).render(
+            outfilepath,
+            indent=indent,
+            minify=minify,
+            compress=compress,
+            cache=get_cache(cachedirpath),
+        )
+        error = None
+    except Exception as exc:
+        error = str(exc) or type(exc).__name__
+    return Result(infilepath, outfilepath, time.perf_counter() - start, error)
+
+
+def run(
+    infilepaths,
+    outdirpath=None,
+    workers=None,
+    indent=2,
+    minify=False,
+    compress=False,
+    cachedirpath=None,
+):
+    """Convert the chart files using at most 'workers' processes;
+    by default the number of processors. Yield a Result for each file
+    in the order they are completed. Raises ValueError before converting
+    any file if two of them would be written to the same SVG file.
+    """
+    assert workers is None or (isinstance(workers, int) and workers > 0)
+    outfilepaths = get_outfilepaths(infilepaths, outdirpath, compress)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, initializer=warm
+    ) as executor:
+        futures = [
+            executor.submit(
+                convert,
+                infilepath,
+                outfilepath,
+                indent=indent,
+                minify=minify,
+                compress=compress,
+                cachedirpath=cachedirpath,
+            )
+            for infilepath, outfilepath in zip(infilepaths, outfilepaths)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
@@ -0,0 +1,346 @@
+"Benchmarks for performance-critical operations."
+
+import copy
+import http.server
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import tracemalloc
+
+import jsonschema
+import yaml
+
+import chart
+import constants
+import datasource
+import lib
+import schema
+import utils
+from marker import Marker
+from minixml import Element
+from table import Table
+from utils import N, format_numbers, get_text_width
+
+
+def bench_element_memory(count=100_000):
+    "Memory per marker element, compared to an element with a per-instance dict."
+
+    class DictElement:
+        "Element with per-instance dict, attributes dict and subelements list."
+
+        def __init__(self, tag, **attrs):
+            self.tag = tag
+            self.attrs = {name: str(value) for name, value in attrs.items()}
+            self.superelement = None
+            self.subelements = []
+
+    def measure(create):
+        random.seed(12345)
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        elements = [create() for i in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return (after - before) / count
+
+    def create(cls):
+        return lambda: cls(
+            "circle",
+            cx=round(random.uniform(0, 600), 3),
+            cy=round(random.uniform(0, 600), 3),
+            r=5,
+            fill="red",
+            stroke="none",
+        )
+
+    dict_bytes = measure(create(DictElement))
+    slots_bytes = measure(create(Element))
+    marker_bytes = measure(
+        lambda: Marker("disc", size=10, color="red").get_graphic(
+            random.uniform(0, 600), random.uniform(0, 600)
+        )
+    )
+    print(f"element with dict:    {dict_bytes:.0f} bytes per marker")
+    print(f"element with slots:   {slots_bytes:.0f} bytes per marker")
+    print(f"disc marker graphic:  {marker_bytes:.0f} bytes per marker")
+
+
+def bench_point_storage(count=100_000):
+    "Memory per point, as a list of instances and in a columnar table."
+    from scatter2d import Point2d
+
+    random.seed(12345)
+    points = [
+        dict(x=random.uniform(0, 100), y=random.uniform(0, 100)) for i in range(count)
+    ]
+    for label, create in [
+        ("list", lambda: [schema.create(Point2d, p, trusted=True) for p in points]),
+        ("table", lambda: Table(Point2d, points)),
+    ]:
+        tracemalloc.start()
+        storage = create()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del storage
+        print(f"point storage, {label + ':':6s} {size / count:.0f} bytes per point")
+
+
+def bench_format_numbers(count=100_000):
+    "Time to format coordinates one by one using 'N', and in batch."
+    random.seed(12345)
+    values = [random.uniform(0, 600) for i in range(count)]
+    single = min(timeit.repeat(lambda: [N(v) for v in values], number=1, repeat=5))
+    batch = min(timeit.repeat(lambda: format_numbers(values), number=1, repeat=5))
+    print(f"format using N:       {1e9 * single / count:.0f} ns per value")
+    print(f"format in batch:      {1e9 * batch / count:.0f} ns per value")
+
+
+def bench_text_width(count=10_000):
+    "Time to measure the width of tick and legend labels, uncached and cached."
+    random.seed(12345)
+    texts = [f"Label {random.randint(0, 1000)}" for i in range(count)]
+    get_text_width.cache_clear()
+    uncached = timeit.timeit(
+        lambda: [get_text_width.__wrapped__(t) for t in texts], number=1
+    )
+    cached = timeit.timeit(lambda: [get_text_width(t) for t in texts], number=1)
+    print(f"text width uncached:  {1e9 * uncached / count:.0f} ns per label")
+    print(f"text width cached:    {1e9 * cached / count:.0f} ns per label")
+
+
+def bench_board_includes(count=300):
+    """Time to read a board including many charts, and to validate a chart.
+    The board is read with distinct included charts, and with one included chart
+    shared by all items, which is read once and then taken from the cache.
+    """
+    note = dict(
+        chysl=constants.__version__,
+        chart="note",
+        title="Note",
+        body="Body of the note.",
+    )
+
+    def get_board(filenames):
+        return dict(
+            chysl=constants.__version__,
+            chart="board",
+            items=[
+                dict(x=10 * i, y=10 * i, subchart=dict(include=filename))
+                for i, filename in enumerate(filenames)
+            ],
+        )
+
+    filenames = [f"note{i}.yaml" for i in range(count)]
+    origdir = os.getcwd()
+    with tempfile.TemporaryDirectory() as dirpath:
+        os.chdir(dirpath)
+        try:
+            for filename in filenames + ["note.yaml"]:
+                with open(filename, "w") as outfile:
+                    yaml.dump(note, outfile)
+                os.utime(filename, (0, 0))  # Old enough to be cached.
+            with open("distinct.yaml", "w") as outfile:
+                yaml.dump(get_board(filenames), outfile)
+            with open("shared.yaml", "w") as outfile:
+                yaml.dump(get_board(["note.yaml"] * count), outfile)
+            chart._chart_cache.clear()
+            cold = timeit.timeit(lambda: chart.retrieve("distinct.yaml"), number=1)
+            chart._chart_cache.clear()
+            shared = timeit.timeit(lambda: chart.retrieve("shared.yaml"), number=1)
+        finally:
+            os.chdir(origdir)
+    cls = chart.get_chart_class("note")
+    data = dict(chart="note", title="Note", body="Body of the note.")
+    fresh = timeit.timeit(
+        lambda: jsonschema.Draft202012Validator(
+            cls.SCHEMA, format_checker=schema.FORMAT_CHECKER
+        ).validate(data),
+        number=1000,
+    )
+    cached = timeit.timeit(lambda: schema.validate(data, cls.SCHEMA), number=1000)
+    print(f"board, {count} distinct includes: {1000 * cold:.0f} ms to read")
+    print(f"board, 1 include {count} times: {1000 * shared:.0f} ms to read")
+    print(f"validate, new validator:    {1000 * fresh:.0f} us per chart")
+    print(f"validate, cached validator: {1000 * cached:.0f} us per chart")
+
+
+def bench_inline_points(count=100_000):
+    "Time to validate and parse a scatter chart with many inline points."
+    random.seed(12345)
+    data = dict(
+        chart="scatter2d",
+        points=[
+            dict(x=random.uniform(0, 100), y=random.uniform(0, 100), color="red")
+            for i in range(count)
+        ],
+    )
+    cls = chart.get_chart_class("scatter2d")
+    standard = jsonschema.Draft202012Validator(
+        cls.SCHEMA, format_checker=schema.FORMAT_CHECKER
+    )
+    elapsed = timeit.timeit(lambda: standard.validate(data), number=1)
+    print(f"{count} points, standard validation: {elapsed:.2f} s")
+    elapsed = timeit.timeit(lambda: schema.validate(data, cls.SCHEMA), number=1)
+    print(f"{count} points, fast validation:     {elapsed:.2f} s")
+    points = data["points"]
+    elapsed = timeit.timeit(lambda: cls(points=copy.deepcopy(points)), number=1)
+    print(f"{count} points, parse:               {elapsed:.2f} s")
+    with schema.trusted():
+        elapsed = timeit.timeit(lambda: cls(points=copy.deepcopy(points)), number=1)
+    print(f"{count} points, parse trusted:       {elapsed:.2f} s")
+
+
+def bench_csv_datasource(count=200_000):
+    "Time and peak memory to read a large CSV datasource, compared to its size."
+    from piechart import Slice
+
+    random.seed(12345)
+    with tempfile.TemporaryDirectory() as dirpath:
+        filepath = os.path.join(dirpath, "slices.csv")
+        with open(filepath, "w") as outfile:
+            outfile.write("value,label,color\n")
+            for i in range(count):
+                outfile.write(f"{random.uniform(1, 100):.3f},Label {i},red\n")
+        size = os.path.getsize(filepath)
+        os.utime(filepath, (0, 0))  # Old enough to be cached, if small enough.
+        tracemalloc.start()
+        start = time.perf_counter()
+        source = datasource.Datasource(dict(source=filepath), Slice)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    print(f"{count} CSV rows, read:        {elapsed:.2f} s")
+    print(f"{count} CSV rows, file size:   {size / 1e6:.1f} MB")
+    print(f"{count} CSV rows, peak memory: {peak / 1e6:.1f} MB")
+    del source
+
+
+def bench_spec_loading(count=20_000):
+    "Time to load a large chart specification as YAML, pure and LibYAML, and JSON."
+    random.seed(12345)
+    data = dict(
+        chysl=constants.__version__,
+        chart="scatter2d",
+        points=[
+            dict(x=round(random.uniform(0, 100), 3), y=round(random.uniform(0, 100), 3))
+            for i in range(count)
+        ],
+    )
+    content = yaml.safe_dump(data)
+    elapsed = timeit.timeit(lambda: yaml.safe_load(content), number=1)
+    print(f"{count} points, YAML pure Python: {elapsed:.2f} s")
+    elapsed = timeit.timeit(lambda: utils.load_yaml(content), number=1)
+    print(f"{count} points, YAML {utils.YamlLoader.__name__}: {elapsed:.2f} s")
+    content = json.dumps(data)
+    elapsed = timeit.timeit(lambda: json.loads(content), number=1)
+    print(f"{count} points, JSON:             {elapsed:.2f} s")
+
+
+def bench_remote_includes(count=50, delay=0.02):
+    "Time to read a board including charts from a slow web server."
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            content = yaml.dump(
+                dict(chysl=constants.__version__, chart="note", title=self.path)
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    board = dict(
+        chysl=constants.__version__,
+        chart="board",
+        items=[
+            dict(x=10 * i, y=10 * i, subchart=dict(include=f"{url}/{i}.yaml"))
+            for i in range(count)
+        ],
+    )
+    origdir = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as dirpath:
+            os.chdir(dirpath)
+            with open("board.yaml", "w") as outfile:
+                yaml.dump(board, outfile)
+            for workers in [1, constants.INCLUDE_WORKERS]:
+                elapsed = timeit.timeit(
+                    lambda: chart.retrieve("board.yaml", workers=workers), number=1
+                )
+                print(
+                    f"board with {count} remote includes, {workers} workers:"
+                    f" {1000 * elapsed:.0f} ms"
+                )
+    finally:
+        os.chdir(origdir)
+        server.shutdown()
+        server.server_close()
+
+
+def bench_import_time(repeat=5):
+    """Time to start a new Python process and import the modules, and to run
+    the command-line tool (best of runs).
+    """
+    dirpath = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmpdirpath:
+        outfilepath = os.path.join(tmpdirpath, "pyramid.svg")
+        infilepath = os.path.join(dirpath, "..", "docs", "pyramid.yaml")
+        for label, arguments in [
+            ("interpreter only", ["-c", "import constants"]),
+            ("import lib", ["-c", "import constants; import lib"]),
+            (
+                "one chart class",
+                ["-c", "import chart; chart.get_chart_class('scatter2d')"],
+            ),
+            (
+                "all chart classes",
+                [
+                    "-c",
+                    "import constants; import chart;"
+                    " list(map(chart.get_chart_class, constants.CHARTS))",
+                ],
+            ),
+            ("cli --help", ["chysl.py", "--help"]),
+            ("cli tosvg", ["chysl.py", "tosvg", infilepath, outfilepath]),
+        ]:
+            command = [sys.executable, *arguments]
+            elapsed = min(
+                timeit.repeat(
+                    lambda: subprocess.run(
+                        command, cwd=dirpath, check=True, stdout=subprocess.DEVNULL
+                    ),
+                    number=1,
+                    repeat=repeat,
+                )
+            )
+            print(f"start, {label + ':':19s} {1000 * elapsed:.0f} ms")
+
+
+def run_benchmarks():
+    bench_element_memory()
+    bench_point_storage()
+    bench_format_numbers()
+    bench_text_width()
+    bench_board_includes()
+    bench_inline_points()
+    bench_spec_loading()
+    bench_csv_datasource()
+    bench_remote_includes()
+    bench_import_time()
+
+
+if __name__ == "__main__":
+    run_benchmarks()
@@ -100,6 +100,9 @@ class Board(Chart):
             dict(subchart=subchart, x=x, y=y, scale=scale, opacity=opacity)
         )
 
+    def get_subcharts(self):
+        return [item["subchart"] for item in self.items]
+
     def as_dict(self):
         result = super().as_dict()
         result["items"] = []
@@ -117,15 +120,15 @@ class Board(Chart):
             result["items"].append(i)
         return result
 
-    def build(self):
+    def build(self, context):
         "Create the SVG elements in the 'svg' attribute."
-        super().build()
+        super().build(context)
         board = Element("g")
         board.total_width = 0
         board.total_height = 0
 
         for item in self.items:
-            item["subchart"].build()
+            item["subchart"].build(context)
             svg = item["subchart"].svg
             xhigh = item["x"] + (item.get("scale") or 1) * svg.total_width
             yhigh = item["y"] + (item.get("scale") or 1) * svg.total_height
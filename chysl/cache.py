@@ -0,0 +1,189 @@
+"Size-bounded caches, safe for use from several threads."
+
+import collections
+import hashlib
+import os
+import pathlib
+import tempfile
+import threading
+import time
+
+# A file modified more recently than this (seconds) is not cached, since a
+# second modification within the resolution of the timestamp would go unnoticed.
+RACY_INTERVAL = 1.0
+
+
+class LRUCache:
+    "Cache which evicts the least recently used entry when full."
+
+    def __init__(self, maxsize=128):
+        assert isinstance(maxsize, int) and maxsize > 0
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f"LRUCache(maxsize={self.maxsize})"
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def get(self, key, default=None):
+        "Return the value for the key, or the default if not in the cache."
+        with self.lock:
+            try:
+                value = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        "Set the value for the key, evicting the least recently used if full."
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        "Remove the entry for the key and return its value, or the default."
+        with self.lock:
+            return self.entries.pop(key, default)
+
+    def clear(self):
+        "Remove all entries and reset the statistics."
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class DiskCache:
+    """Cache of text values stored as files in a directory, which evicts the
+    least recently used entry when full. Has the same interface as LRUCache,
+    but the keys must be strings. Failures to read or write are ignored.
+    """
+
+    def __init__(self, dirpath, maxsize=1024, suffix=".txt"):
+        assert isinstance(maxsize, int) and maxsize > 0
+        self.dirpath = pathlib.Path(dirpath)
+        self.dirpath.mkdir(parents=True, exist_ok=True)
+        self.maxsize = maxsize
+        self.suffix = suffix
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f"DiskCache('{self.dirpath}', maxsize={self.maxsize})"
+
+    def __len__(self):
+        return len(self.get_filepaths())
+
+    def __contains__(self, key):
+        return self.get_filepath(key).exists()
+
+    def get_filepath(self, key):
+        "Return the path of the file for the key."
+        assert isinstance(key, str)
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.dirpath / (digest + self.suffix)
+
+    def get_filepaths(self):
+        "Return the paths of the files for all entries."
+        return list(self.dirpath.glob("*" + self.suffix))
+
+    def get(self, key, default=None):
+        "Return the value for the key, or the default if not in the cache."
+        filepath = self.get_filepath(key)
+        try:
+            value = filepath.read_text(encoding="utf-8")
+            os.utime(filepath)  # The modification time records the last use.
+        except OSError:
+            with self.lock:
+                self.misses += 1
+            return default
+        with self.lock:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        "Set the value for the key, evicting the least recently used if full."
+        assert isinstance(value, str)
+        try:
+            write_file(self.get_filepath(key), value)
+        except OSError:
+            return
+        with self.lock:
+            filepaths = self.get_filepaths()
+            if len(filepaths) <= self.maxsize:
+                return
+            entries = []
+            for filepath in filepaths:
+                try:
+                    entries.append((filepath.stat().st_mtime_ns, filepath))
+                except OSError:
+                    pass
+            entries.sort()
+            for mtime, filepath in entries[: len(entries) - self.maxsize]:
+                filepath.unlink(missing_ok=True)
+
+    def pop(self, key, default=None):
+        "Remove the entry for the key and return its value, or the default."
+        filepath = self.get_filepath(key)
+        try:
+            value = filepath.read_text(encoding="utf-8")
+            filepath.unlink()
+        except OSError:
+            return default
+        return value
+
+    def clear(self):
+        "Remove all entries and reset the statistics."
+        with self.lock:
+            for filepath in self.get_filepaths():
+                filepath.unlink(missing_ok=True)
+            self.hits = 0
+            self.misses = 0
+
+
+def get_file_key(path):
+    """Return a key identifying the current content of the file: its real path,
+    modification time and size. Return None if the file was modified too
+    recently for the key to be trusted. Raises OSError if the file is not found.
+    """
+    stat = os.stat(path)
+    if time.time() - stat.st_mtime <= RACY_INTERVAL:
+        return None
+    return (os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def write_file(filepath, text):
+    """Write the text to the file. It is first written to a temporary file in
+    the same directory, which is then renamed, so that a reader never sees
+    a partial file. Raises OSError if the file could not be written.
+    """
+    filepath = pathlib.Path(filepath)
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=filepath.parent, suffix=".tmp", delete=False
+    ) as outfile:
+        try:
+            outfile.write(text)
+        except OSError:
+            outfile.close()
+            os.unlink(outfile.name)
+            raise
+    try:
+        os.replace(outfile.name, filepath)
+    except OSError:
+        os.unlink(outfile.name)
+        raise
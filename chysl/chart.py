@@ -1,21 +1,29 @@
 "Abstract Chart class."
 
-import icecream
-
-icecream.install()
-
+import concurrent.futures
+import contextvars
+import copy
+import gzip
+import hashlib
+import importlib
+import io
+import itertools
+import json
 import pathlib
 import urllib.parse
 
-import requests
-import requests.exceptions
 import yaml
 
+import cache
 import components
 import constants
 import memo
+import minixml
 import schema
+import style
 import utils
+import web
+from minify import minify_document
 from minixml import Element
 from vector2 import Vector2
 from utils import N
@@ -50,14 +58,162 @@ class Chart:
             result["description"] = self.description
         return result
 
-    def render(self, target=None, antialias=True, indent=2, restart_unique_id=False):
+    def get_subcharts(self):
+        "Return the subcharts; contained or included. None by default."
+        return []
+
+    def get_datasources(self):
+        "Return the datasources read by this chart, not its subcharts. None by default."
+        return []
+
+    def get_cache_key(self, **options):
+        """Return the key for the SVG code rendered with the given options:
+        a hash of the specifications of this chart and all its subcharts,
+        and the fingerprints of their datasources. Return None if the state
+        of any datasource is unknown, so that the SVG code must not be cached.
+        """
+        specs = []
+        fingerprints = []
+        stack = [self]
+        while stack:
+            chart = stack.pop(0)
+            specs.append(chart.as_dict())
+            for datasource in chart.get_datasources():
+                if datasource.fingerprint is None:
+                    return None
+                fingerprints.append(datasource.fingerprint)
+            stack.extend(chart.get_subcharts())
+        material = json.dumps(
+            [constants.__version__, options, specs, fingerprints],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def render(
+        self,
+        target=None,
+        antialias=True,
+        indent=2,
+        *,
+        symbols=False,
+        styles=False,
+        minify=False,
+        compress=False,
+        cache=None,
+        id_prefix=None,
+    ):
         """Render chart and return the SVG code.
         If target is provided, write into file given by path or open file object.
+        The SVG code is then written in chunks, without first creating the entire string.
+        If 'compress' is true, or the target path ends with '.svgz', the SVG code
+        is gzip-compressed while it is written. The target file object must then
+        be binary, and if no target is given, the compressed bytes are returned.
+        If 'symbols' is true, each distinct marker is defined once as a symbol,
+        which is referenced for each point.
+        If 'styles' is true, repeated presentation attributes are hoisted into
+        CSS classes; the number of bytes saved is recorded in 'hoisted_bytes'.
+        If 'minify' is true, output the smallest SVG code possible; no XML
+        declaration, no whitespace, shortened path data, no default attributes.
+        If 'id_prefix' is given, it starts all ids and hoisted class names,
+        so that several SVG documents can be inlined in the same HTML page.
+        If 'cache' is given, a cache.LRUCache or cache.DiskCache, the SVG code
+        is taken from it if the chart, its subcharts and their datasources are
+        unchanged since it was stored; 'hoisted_bytes' is then not set.
         """
-        if restart_unique_id:
-            utils.restart_unique_id()
+        options = dict(
+            indent=None if minify else indent, xml_decl=not minify, compact=minify
+        )
+        text = None
+        if cache is not None:
+            key = self.get_cache_key(
+                antialias=antialias,
+                symbols=symbols,
+                styles=styles,
+                id_prefix=id_prefix,
+                **options,
+            )
+            if key:
+                text = cache.get(key)
+        if text is None:
+            document = self.get_document(
+                antialias=antialias,
+                symbols=symbols,
+                styles=styles,
+                minify=minify,
+                id_prefix=id_prefix,
+            )
+            if cache is not None and key:
+                text = "".join(document.generate(**options))
+                cache.set(key, text)
 
-        self.build()
+        def write(outfile):
+            if text is None:
+                document.write(outfile, **options)
+            else:
+                outfile.write(text)
+
+        if isinstance(target, (str, pathlib.Path)):
+            if compress or str(target).endswith(".svgz"):
+                with gzip.open(target, "wt", encoding="utf-8") as outfile:
+                    write(outfile)
+            else:
+                with open(target, "w") as outfile:
+                    write(outfile)
+        elif compress:
+            buffer = io.BytesIO() if target is None else target
+            with gzip.GzipFile(fileobj=buffer, mode="wb") as gzipfile:
+                with io.TextIOWrapper(gzipfile, encoding="utf-8") as outfile:
+                    write(outfile)
+            if target is None:
+                return buffer.getvalue()
+        elif target is None:
+            if text is None:
+                return "".join(document.generate(**options))
+            return text
+        else:
+            write(target)
+
+    def iter_svg(
+        self,
+        antialias=True,
+        indent=2,
+        *,
+        symbols=False,
+        styles=False,
+        minify=False,
+        id_prefix=None,
+        chunk_size=minixml.CHUNK_SIZE,
+    ):
+        """Render chart and generate the SVG code in chunks of approximately
+        the given size (characters). Allows e.g. a HTTP response to start
+        sending before the entire SVG code has been produced.
+        """
+        document = self.get_document(
+            antialias=antialias,
+            symbols=symbols,
+            styles=styles,
+            minify=minify,
+            id_prefix=id_prefix,
+        )
+        yield from document.iter_chunks(
+            indent=None if minify else indent,
+            xml_decl=not minify,
+            compact=minify,
+            chunk_size=chunk_size,
+        )
+
+    def get_document(
+        self,
+        antialias=True,
+        *,
+        symbols=False,
+        styles=False,
+        minify=False,
+        id_prefix=None,
+    ):
+        "Build the chart and return the root 'svg' element of the SVG document."
+        self.build(RenderContext(symbols=symbols, id_prefix=id_prefix))
 
         if antialias:
             extent = Vector2(self.svg.total_width + 1, self.svg.total_height + 1)
@@ -74,7 +230,6 @@ class Chart:
             viewBox=f"0 0 {N(extent.x)} {N(extent.y)}",
             transform=transform,
         )
-        document.repr_indent = indent
 
         if self.title:
             document += Element("title", str(self.title))
@@ -84,16 +239,19 @@ class Chart:
         for elem in self.svg:
             document += elem
 
-        if isinstance(target, (str, pathlib.Path)):
-            with open(target, "w") as outfile:
-                outfile.write(repr(document))
-        elif target is None:
-            return repr(document)
-        else:
-            target.write(repr(document))
+        # Minify before hoisting, since minifying does not consider CSS classes.
+        if minify:
+            minify_document(document)
+        if styles:
+            self.hoisted_bytes = style.hoist(
+                document, prefix=f"{id_prefix}s" if id_prefix else None
+            )
+
+        return document
 
-    def build(self):
+    def build(self, context):
         """Create and add the SVG elements to the 'svg' attribute.
+        The render context provides unique ids and the rendering options.
         To be extended in subclasses.
         """
         self.svg = SvgContainer()
@@ -107,17 +265,38 @@ class Chart:
             schema.validate(data, self.SCHEMA)
         except ValueError:
             with open("error.yaml", "w") as outfile:
-                yaml.dump(data, outfile, allow_unicode=True, sort_keys=False)
+                utils.dump_yaml(data, outfile)
             raise
         content = dict(chysl=constants.__version__)
         content.update(data)
         if isinstance(target, (str, pathlib.Path)):
             with open(target, "w") as outfile:
-                yaml.dump(content, outfile, allow_unicode=True, sort_keys=False)
+                utils.dump_yaml(content, outfile)
         elif target is None:
-            return yaml.dump(content, allow_unicode=True, sort_keys=False)
+            return utils.dump_yaml(content)
         else:
-            yaml.dump(content, outfile, allow_unicode=True, sort_keys=False)
+            utils.dump_yaml(content, target)
+
+
+class RenderContext:
+    """State for rendering a chart: the counter for ids unique within
+    the SVG document, and the rendering options. Each rendering has its own
+    context, so that charts may be rendered concurrently, and the ids are
+    the same each time a chart is rendered.
+    If 'symbols' is true, markers are defined once as symbols and referenced.
+    If 'id_prefix' is given, it starts all ids, so that these are unique also
+    among several SVG documents inlined in the same HTML page.
+    """
+
+    def __init__(self, symbols=False, id_prefix=None):
+        assert id_prefix is None or isinstance(id_prefix, str)
+        self.symbols = symbols
+        self.id_prefix = id_prefix or ""
+        self.id_counter = itertools.count(1)
+
+    def new_id(self):
+        "Return a new id, unique within the SVG document."
+        return f"{self.id_prefix}id{next(self.id_counter)}"
 
 
 class SvgContainer:
@@ -281,7 +460,15 @@ def register(cls):
 
 
 def get_chart_class(name):
-    "Return the class for the chart name."
+    """Return the class for the chart name. The module defining it is imported
+    when first needed. Raises KeyError if there is no such chart.
+    """
+    try:
+        return _chart_class_lookup[name]
+    except KeyError:
+        if name not in constants.CHARTS:
+            raise
+    importlib.import_module(name)  # The module has the same name as the chart.
     return _chart_class_lookup[name]
 
 
@@ -292,13 +479,11 @@ def parse(data):
         location = data["include"]
         reader = ChartReader(location)
         try:
-            memo.check_add(reader)
-            chart = reader.get_chart()
+            with memo.including(reader.location):
+                chart = reader.get_chart()
             chart.location = location  # Record the location for later output.
         except ValueError as error:
             raise ValueError(f"error reading from '{reader}': {error}")
-        finally:
-            memo.remove(reader)
     else:
         try:
             name = data.pop("chart")
@@ -312,65 +497,208 @@ def parse(data):
     return chart
 
 
-def retrieve(location):
-    """Read and parse the YAML file given by its path or URL.
+def retrieve(location, workers=None, content=None):
+    """Read and parse the YAML or JSON file given by its path or URL.
+    If 'content' is given, it is parsed instead of reading the location,
+    which then only identifies the chart and decides the format by its suffix.
+    Any included charts are read concurrently using at most 'workers' threads;
+    by default 'constants.INCLUDE_WORKERS'.
     Return a Chart instance.
     """
-    reader = ChartReader(location)
+    reader = ChartReader(location, content=content)
     try:
-        memo.check_add(reader)
-        return reader.get_chart()
+        with memo.including(reader.location):
+            return reader.get_chart(workers=workers)
     except ValueError as error:
         raise ValueError(f"error reading from '{reader}': {error}")
-    finally:
-        memo.remove(reader)
+
+
+def find_includes(data):
+    "Return the locations of the charts included in the chart specification data."
+    result = []
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            if "include" in item:
+                result.append(item["include"])
+            else:
+                stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return result
+
+
+def check_cycles(location, graph):
+    """Check the graph of includes, starting at the location, for cycles.
+    Raises ValueError if there is a cycle.
+    """
+    # Each stack item: location, its path from the start, and if it is finished.
+    stack = [(location, (location,), False)]
+    finished = set()
+    while stack:
+        location, path, done = stack.pop()
+        if done:
+            finished.add(location)
+            continue
+        if location in finished:
+            continue
+        stack.append((location, path, True))
+        for included in graph.get(location, []):
+            if included in path:
+                cycle = " -> ".join(path[path.index(included) :] + (included,))
+                raise ValueError(f"cycle of includes: {cycle}")
+            stack.append((included, path + (included,), False))
+
+
+# Validated chart specification data, keyed by file path, modification time and
+# size, or by URL. The data is copied when used, since parsing modifies it.
+_chart_cache = cache.LRUCache(constants.CHART_CACHE_SIZE)
+
+# Chart specifications read ahead of parsing, keyed by location.
+_prefetched = contextvars.ContextVar("prefetched", default=None)
 
 
 class ChartReader:
     "Read the chart specification from a location; file path or href."
 
-    def __init__(self, location):
+    def __init__(self, location, content=None):
+        assert content is None or isinstance(content, str)
         self.location = str(location)
+        self.content = content
 
     def __str__(self):
         return f"Reader('{self.location}')"
 
-    def get_chart(self):
-        """Read the data, parse as YAML, and return the instance of a Chart subclass.
+    def get_chart(self, workers=None):
+        """Read the data, and return a new instance of a Chart subclass.
         The meta information is stored in attribute 'meta'.
-        If any of the following tests fail, raises ValueError:
-        - The presence and validity of the 'chysl' format identification marker.
-        - The compatibility of the version of the file, if given.
-        - Check the data against the appropriate schema.
+        Any included charts are read concurrently before parsing, using
+        at most 'workers' threads; by default 'constants.INCLUDE_WORKERS'.
+        Raises ValueError if the data could not be read or is invalid,
+        or if there is a cycle of includes.
+        """
+        data = self.read()
+        # Within an enclosing chart, the includes have already been read.
+        if _prefetched.get() is None and find_includes(data):
+            token = _prefetched.set(self.prefetch(data, workers=workers))
+        else:
+            token = None
+        # Create the class instance from the data, which has been validated.
+        try:
+            with schema.trusted():
+                return parse(data)
+        finally:
+            if token:
+                _prefetched.reset(token)
+
+    def prefetch(self, data, workers=None):
+        """Discover the tree of includes in the data, reading the included
+        charts concurrently, level by level. Return the data of each chart,
+        keyed by location. Raises ValueError if any of them could not be read,
+        or if there is a cycle of includes.
         """
+        if workers is None:
+            workers = constants.INCLUDE_WORKERS
+        assert isinstance(workers, int) and workers >= 1
+
+        def read(reader):
+            try:
+                reader.read()
+            except ValueError as error:
+                raise ValueError(f"error reading from '{reader}': {error}")
+            return reader
+
+        result = {}
+        graph = {self.location: find_includes(data)}
+        pending = set(graph[self.location])
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending:
+                readers = [ChartReader(location) for location in sorted(pending)]
+                # Each thread reads within a copy of the current context.
+                contexts = [contextvars.copy_context() for reader in readers]
+                for reader in executor.map(
+                    lambda context, reader: context.run(read, reader), contexts, readers
+                ):
+                    result[reader.location] = (reader.meta, reader.data)
+                    graph[reader.location] = find_includes(reader.data)
+                pending = set()
+                for locations in graph.values():
+                    pending.update(set(locations).difference(graph))
+        check_cycles(self.location, graph)
+        return result
+
+    def read(self):
+        """Read the data, check it, and return it. The meta information is
+        stored in attribute 'meta'. The data is cached, keyed by the file path,
+        modification time and size, or by URL and the ETag or Last-Modified
+        header of the resource. Data read ahead of parsing is used, if any.
+        Content given when creating the reader is parsed instead, uncached.
+        Raises ValueError if the data could not be read or is invalid.
+        """
+        if self.content is not None:
+            self.parse_content(self.content)
+            return self.data
+        memo.depend(self.location)
+        if (prefetched := _prefetched.get()) and self.location in prefetched:
+            self.meta, self.data = prefetched[self.location]
+            self.meta = copy.deepcopy(self.meta)
+            self.data = copy.deepcopy(self.data)
+            return self.data
         parts = urllib.parse.urlparse(self.location)
         if not parts.scheme or parts.scheme == "file":
             try:
-                with open(self.location) as infile:
-                    content = infile.read()
+                key = cache.get_file_key(self.location)
+                if key and (entry := _chart_cache.get(key)):
+                    self.meta, self.data = entry
+                else:
+                    with open(self.location) as infile:
+                        self.parse_content(infile.read())
+                    if key:
+                        _chart_cache.set(key, (self.meta, self.data))
             except OSError as error:
                 raise ValueError(str(error))
         else:  # Assume URL such as 'http' or 'https'.
+            content, validator = web.get(self.location)
+            key = (self.location, validator)
+            if validator and (entry := _chart_cache.get(key)):
+                self.meta, self.data = entry
+            else:
+                self.parse_content(content)
+                if validator:
+                    _chart_cache.set(key, (self.meta, self.data))
+        self.meta = copy.deepcopy(self.meta)
+        self.data = copy.deepcopy(self.data)
+        return self.data
+
+    def parse_content(self, content):
+        """Parse the content as JSON if the location has the suffix '.json',
+        else as YAML, and check it. Set the attributes 'meta' and 'data'.
+        If any of the following tests fail, raises ValueError:
+        - The presence and validity of the 'chysl' format identification marker.
+        - The compatibility of the version of the file, if given.
+        - Check the data against the appropriate schema.
+        """
+        path = urllib.parse.urlparse(self.location).path
+        if pathlib.PurePosixPath(path).suffix.lower() == ".json":
             try:
-                response = requests.get(self.location)
-                response.raise_for_status()
-                content = response.text
-            except requests.exceptions.RequestException as error:
-                raise ValueError(str(error))
-
-        try:
-            self.data = yaml.safe_load(content)
-            if not isinstance(self.data, dict):
-                raise ValueError("must contain a top-level mapping")
-        except (yaml.YAMLError, ValueError) as error:
-            raise ValueError(f"cannot interpret data as YAML: {error}")
+                self.data = json.loads(content)
+                if not isinstance(self.data, dict):
+                    raise ValueError("must contain a top-level object")
+            except ValueError as error:
+                raise ValueError(f"cannot interpret data as JSON: {error}")
+        else:
+            try:
+                self.data = utils.load_yaml(content)
+                if not isinstance(self.data, dict):
+                    raise ValueError("must contain a top-level mapping")
+            except (yaml.YAMLError, ValueError) as error:
+                raise ValueError(f"cannot interpret data as YAML: {error}")
         # Process and remove the meta information.
         try:
             self.meta = self.data.pop("chysl")
         except KeyError:
-            raise ValueError(
-                "YAML data lacks the Chysl format identifiation marker 'chysl'"
-            )
+            raise ValueError("data lacks the Chysl format identifiation marker 'chysl'")
         if self.meta:
             if isinstance(self.meta, dict):
                 version = self.meta.get("version")
@@ -379,16 +707,14 @@ class ChartReader:
                 self.meta = dict(version=version)
             # XXX Currently checks for strict equality.
             if version != constants.__version__:
-                raise ValueError(f"YAML data incompatible version {version}")
+                raise ValueError(f"data incompatible version {version}")
         # Do schema validation on the incoming data.
         try:
             name = self.data["chart"]
         except KeyError:
-            raise ValueError("no 'chart' defined in the YAML file")
+            raise ValueError("no 'chart' defined in the data")
         try:
             cls = get_chart_class(name)
         except KeyError:
-            raise ValueError(f"unknown chart '{name}' specified in the YAML file")
+            raise ValueError(f"unknown chart '{name}' specified in the data")
         schema.validate(self.data, cls.SCHEMA)
-        # Create the class instance from the data.
-        return parse(self.data)
@@ -1,29 +1,224 @@
-"Convert Chysl YAML file to SVG."
+"Convert Chysl YAML or JSON files to SVG."
 
+import os
 import pathlib
 import sys
+import time
+import urllib.parse
 
 import click
 
-import lib
+# The modules for the subcommands are imported only by the command using them,
+# since they take time to import.
 
 
-@click.command()
+@click.group()
+def cli():
+    "Chysl command-line tool."
+
+
+@cli.command()
 @click.option("-i", "--indent", default=2, type=int)
+@click.option("-m", "--minify", is_flag=True, help="Output minified SVG code.")
+@click.option(
+    "-z", "--compress", is_flag=True, help="Output gzip-compressed SVG code (.svgz)."
+)
 @click.argument("infilepath", nargs=1, required=True)
 @click.argument("outfilepath", nargs=1, required=False)
-def tosvg(indent, infilepath, outfilepath):
+def tosvg(indent, minify, compress, infilepath, outfilepath):
+    "Convert a chart file to SVG."
+    import chart
+
     infilepath = pathlib.Path(infilepath)
     if not infilepath.exists():
         raise click.BadParameter("no such input file")
     try:
-        diagram = lib.retrieve(infilepath)
+        diagram = chart.retrieve(infilepath)
     except ValueError as error:
         sys.exit(f"Error: {error}")
     if not outfilepath:
-        outfilepath = infilepath.with_suffix(".svg")
-    diagram.render(outfilepath, indent=max(0, indent))
+        outfilepath = infilepath.with_suffix(".svgz" if compress else ".svg")
+    diagram.render(outfilepath, indent=max(0, indent), minify=minify, compress=compress)
+
+
+@cli.command("batch")
+@click.option("-i", "--indent", default=2, type=int)
+@click.option("-m", "--minify", is_flag=True, help="Output minified SVG code.")
+@click.option(
+    "-z", "--compress", is_flag=True, help="Output gzip-compressed SVG code (.svgz)."
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    help="Number of worker processes; default the number of processors.",
+)
+@click.option(
+    "-o",
+    "--outdir",
+    type=click.Path(file_okay=False),
+    help="Directory for the SVG files; default beside each input file.",
+)
+@click.option(
+    "-c",
+    "--cache",
+    type=click.Path(file_okay=False),
+    help="Directory for caching the SVG code of unchanged charts.",
+)
+@click.option("-q", "--quiet", is_flag=True, help="Report only failures.")
+@click.argument("patterns", nargs=-1, required=True)
+def batch_command(indent, minify, compress, jobs, outdir, cache, quiet, patterns):
+    """Convert many chart files to SVG using a pool of worker processes.
+    The input may be given as files, directories or glob patterns.
+    """
+    import batch
+
+    infilepaths = batch.find_files(patterns)
+    start = time.perf_counter()
+    failures = 0
+    try:
+        for result in batch.run(
+            infilepaths,
+            outdirpath=outdir,
+            workers=jobs,
+            indent=max(0, indent),
+            minify=minify,
+            compress=compress,
+            cachedirpath=cache,
+        ):
+            report(result, quiet=quiet)
+            if result.error:
+                failures += 1
+    except ValueError as error:
+        sys.exit(f"Error: {error}")
+    elapsed = time.perf_counter() - start
+    click.echo(
+        f"{len(infilepaths)} files, {failures} failed, {elapsed:.2f} s", err=True
+    )
+    if failures:
+        sys.exit(1)
+
+
+@cli.command("watch")
+@click.option("-i", "--indent", default=2, type=int)
+@click.option("-m", "--minify", is_flag=True, help="Output minified SVG code.")
+@click.option(
+    "-z", "--compress", is_flag=True, help="Output gzip-compressed SVG code (.svgz)."
+)
+@click.option(
+    "-o",
+    "--outdir",
+    type=click.Path(file_okay=False),
+    help="Directory for the SVG files; default beside each input file.",
+)
+@click.option(
+    "-n",
+    "--interval",
+    default=1.0,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Seconds between checks for changes.",
+)
+@click.option("-q", "--quiet", is_flag=True, help="Report only failures.")
+@click.argument("patterns", nargs=-1, required=True)
+def watch_command(indent, minify, compress, outdir, interval, quiet, patterns):
+    """Render chart files to SVG, and re-render them whenever any of the files
+    they depend on changes: the chart file, its included charts or datasources.
+    The input may be given as files, directories or glob patterns.
+    """
+    import batch
+    import watch
+
+    try:
+        watcher = watch.Watcher(
+            batch.find_files(patterns),
+            outdirpath=outdir,
+            indent=max(0, indent),
+            minify=minify,
+            compress=compress,
+        )
+    except ValueError as error:
+        sys.exit(f"Error: {error}")
+    try:
+        for result in watcher.run(interval=interval):
+            report(result, quiet=quiet)
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.command("serve")
+@click.option("-p", "--port", default=8000, type=click.IntRange(0, 65535))
+@click.option(
+    "-r",
+    "--root",
+    default=".",
+    type=click.Path(exists=True, file_okay=False),
+    help="Directory containing the chart files and datasources that may be read.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    help="Max number of charts rendered concurrently.",
+)
+@click.option(
+    "-c",
+    "--cache",
+    type=click.Path(file_okay=False),
+    help="Directory for caching the SVG code; default in memory.",
+)
+@click.option(
+    "-a",
+    "--allow",
+    multiple=True,
+    help="URL prefix of web resources that charts may read; may be repeated."
+    " By default, none.",
+)
+@click.option("-q", "--quiet", is_flag=True, help="Do not log requests.")
+def serve_command(port, root, jobs, cache, allow, quiet):
+    """Run a local HTTP service rendering charts to SVG, keeping caches warm.
+    GET the path of a chart file relative to the root directory, or POST
+    a chart specification in YAML or JSON. The service listens on localhost only.
+    Charts may read web resources only if allowed by the '--allow' option.
+    """
+    import serve
+
+    if cache:
+        cache = os.path.abspath(cache)
+    os.chdir(root)
+    for url in allow:
+        parts = urllib.parse.urlparse(url)
+        if parts.scheme not in ("http", "https") or not parts.netloc:
+            raise click.BadParameter(f"not an http(s) URL: {url}")
+    server = serve.Server(
+        ("127.0.0.1", port),
+        workers=jobs,
+        quiet=quiet,
+        cachedirpath=cache,
+        allowed_urls=allow,
+    )
+    host, port = server.server_address[:2]
+    click.echo(f"serving charts in {server.rootdirpath} at http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def report(result, quiet=False):
+    "Output the result of converting a chart file."
+    if result.error:
+        click.echo(
+            f"FAIL {result.elapsed:7.3f} s  {result.infilepath}: {result.error}",
+            err=True,
+        )
+    elif not quiet:
+        click.echo(
+            f"ok   {result.elapsed:7.3f} s  {result.infilepath}"
+            f" -> {result.outfilepath}"
+        )
 
 
 if __name__ == "__main__":
-    tosvg()
+    cli()
@@ -78,6 +78,9 @@ class Column(Chart):
             subchart = parse(subchart)
         self.subcharts.append(subchart)
 
+    def get_subcharts(self):
+        return list(self.subcharts)
+
     def as_dict(self):
         result = super().as_dict()
         result["subcharts"] = []
@@ -92,9 +95,9 @@ class Column(Chart):
             result["padding"] = self.padding
         return result
 
-    def build(self):
+    def build(self, context):
         "Create the SVG elements in the 'svg' attribute."
-        super().build()
+        super().build(context)
         layout = Layout(
             rows=len(self.subcharts),
             columns=1,
@@ -105,7 +108,7 @@ class Column(Chart):
         )
 
         for pos, subchart in enumerate(self.subcharts):
-            subchart.build()
+            subchart.build(context)
             for element in subchart.svg:
                 layout.add(pos, 0, element)
 
@@ -27,6 +27,15 @@ ABS_TOL = 0.0005
 
 FORMATS = ["csv", "tsv", "json", "yaml"]
 
+CHART_CACHE_SIZE = 256  # Max number of chart specifications kept in the cache.
+WEB_CACHE_SIZE = 256  # Max number of web resources kept in the memory cache.
+DATASOURCE_CACHE_SIZE = 64  # Max number of datasources kept in the cache.
+DATASOURCE_CACHE_BYTES = 1_000_000  # Max size of a CSV datasource cached (bytes).
+DATASOURCE_CHUNK_SIZE = 10_000  # Number of records converted and checked at once.
+RENDER_CACHE_SIZE = 1024  # Max number of rendered SVG codes kept in a cache.
+INCLUDE_WORKERS = 8  # Max number of threads reading included charts concurrently.
+SERVE_WORKERS = 4  # Max number of charts rendered concurrently by the service.
+
 DEFAULT_LINE_WIDTH = 1
 DEFAULT_PADDING = 0
 DEFAULT_ANCHOR = "middle"
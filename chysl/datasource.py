@@ -2,18 +2,28 @@
 
 import copy
 import csv
-import io
+import itertools
 import json
+import math
+import os
 import pathlib
 import sqlite3
 import urllib.parse
 
-import requests
-import requests.exceptions
 import yaml
 
+import cache
 import constants
+import memo
 import utils
+import web
+from table import Table
+
+# Records read from files, web resources and databases, keyed by the fingerprint
+# of the source: the file path, modification time and size, or the URL and its
+# validator, along with the format or SQL query. The records must not be
+# modified, since they are shared by all datasources reading them.
+_records = cache.LRUCache(constants.DATASOURCE_CACHE_SIZE)
 
 
 class Datasource:
@@ -26,7 +36,9 @@ class Datasource:
         assert isinstance(record_class, type)
 
         self.record_class = record_class
-        self.data = []
+        self.data = Table(record_class)
+        # Identifies the state of the source when read; None if unknown.
+        self.fingerprint = None
         self.source = spec["source"]
 
         # Database.
@@ -46,35 +58,92 @@ class Datasource:
             self.read_file_or_webresource()
 
     def add(self, record):
+        """Add the record, given as an instance of the record class, or as
+        a dictionary of values which are converted and checked.
+        """
         assert isinstance(record, (dict, self.record_class))
         if isinstance(record, dict):
-            try:
-                for key, functions in self.record_class.fields.items():
-                    if not functions:
-                        continue
-                    value = record.get(key)
-                    if value is None:
-                        if functions.get("required"):
-                            raise ValueError(f"missing value for '{key}'")
-                        continue
-                    if convert := functions.get("convert"):
-                        value = convert(value)
-                    if check := functions.get("check"):
-                        if not check(value):
-                            raise ValueError(f"invalid value '{record[key]}'")
-                    record[key] = value
-            except (ValueError, TypeError) as error:
-                raise ValueError(f"record # {len(self.data)}: {error}")
-            record = self.record_class(**record)
-        self.data.append(record)
+            self.add_columns(
+                {key: [record.get(key)] for key in self.record_class.fields}
+            )
+        else:
+            self.data.append(record)
+
+    def add_columns(self, columns):
+        """Add the records given by column: a dictionary of lists of values,
+        keyed by field name, with None for missing values. Each column is
+        converted and checked as a whole. Raises ValueError giving the number
+        of the first record having an invalid value.
+        """
+        errors = []
+        for order, (key, functions) in enumerate(self.record_class.fields.items()):
+            if not functions:
+                continue
+            values, error = convert_column(key, columns[key], functions)
+            if error:
+                index, message = error
+                errors.append((index, order, message))
+            else:
+                columns[key] = values
+        if errors:
+            index, order, message = min(errors)
+            raise ValueError(f"record # {len(self.data) + index}: {message}")
+        self.data.extend(columns)
+
+    def add_records(self, records, fields):
+        """Add the records given as dictionaries, in chunks. The fields are given
+        as tuples of field name, key in the record and value map, if any.
+        """
+        for start in range(0, len(records), constants.DATASOURCE_CHUNK_SIZE):
+            chunk = records[start : start + constants.DATASOURCE_CHUNK_SIZE]
+            columns = {}
+            for key, name, mapping in fields:
+                values = [record.get(name) for record in chunk]
+                if mapping is not None:
+                    values = [mapping.get(value, value) for value in values]
+                columns[key] = values
+            self.add_columns(columns)
+
+    def get_fields(self):
+        """Return the relevant fields as tuples of field name, key in the
+        record after applying the field key map, if defined, and value map.
+        """
+        result = []
+        for key in self.record_class.fields:
+            field = self.map.get(key, key)
+            if isinstance(field, dict):
+                result.append((key, field["field"], field["map"]))
+            else:
+                result.append((key, field, None))
+        return result
 
     def read_database(self):
         # Currently Sqlite is the only db interface available.
         assert self.database == "sqlite"
-        cnx = sqlite3.connect(f"file:{self.source}?mode=ro", uri=True)
-        cnx.row_factory = self._sqlite_dict_factory
-        for record in cnx.execute(self.select):
-            self.add(record)
+        # A database in WAL mode may change without its file being modified.
+        walpath = self.source + "-wal"
+        for location in (self.source, walpath, self.source + "-shm"):
+            memo.depend(location)
+        try:
+            keys = [cache.get_file_key(self.source)]
+            if os.path.exists(walpath):
+                keys.append(cache.get_file_key(walpath))
+        except OSError:
+            keys = [None]
+        self.fingerprint = (*keys, self.select) if all(keys) else None
+        records = _records.get(self.fingerprint) if self.fingerprint else None
+        if records is None:
+            cnx = sqlite3.connect(f"file:{self.source}?mode=ro", uri=True)
+            try:
+                cnx.row_factory = self._sqlite_dict_factory
+                records = list(cnx.execute(self.select))
+            finally:
+                cnx.close()
+            if self.fingerprint:
+                _records.set(self.fingerprint, records)
+        self.add_records(
+            records, [(key, key, None) for key in self.record_class.fields]
+        )
 
     def _sqlite_dict_factory(self, cursor, row):
         try:
@@ -88,51 +157,38 @@ class Datasource:
     def read_file_or_webresource(self):
         assert self.format in constants.FORMATS
 
+        memo.depend(self.source)
+        if self.format in ("csv", "tsv"):
+            self.read_csv()
+            return
+
         if urllib.parse.urlparse(self.source).scheme:  # Probably http or https.
-            try:
-                response = requests.get(self.source)
-                response.raise_for_status()
-                content = response.text
-            except requests.exceptions.RequestException as error:
-                raise ValueError(str(error))
+            content, validator = web.get(self.source)
+            key = (self.source, validator) if validator else None
         else:
+            content = None
             try:
-                with open(self.source) as infile:
-                    content = infile.read()
+                key = cache.get_file_key(self.source)
             except OSError as error:
                 raise ValueError(str(error))
+        self.fingerprint = (key, self.format) if key else None
+        records = _records.get(self.fingerprint) if self.fingerprint else None
+        if records is None:
+            if content is None:
+                try:
+                    with open(self.source) as infile:
+                        content = infile.read()
+                except OSError as error:
+                    raise ValueError(str(error))
+            records = self.parse_content(content)
+            if self.fingerprint:
+                _records.set(self.fingerprint, records)
 
-        match self.format:
+        self.add_records(records, self.get_fields())
 
-            case "csv" | "tsv":
-                dialect = "excel" if self.format == "csv" else "excel_tab"
-                # Check if the content has a header.
-                # Heuristic: Is first value interpretable as float, then not a header.
-                # (Tried 'csv.Sniffer' but it didn't behave well.)
-                peek_reader = csv.reader(io.StringIO(content), dialect=dialect)
-                first_record = next(peek_reader)
-                for part in first_record:
-                    try:
-                        float(part)
-                    except ValueError:
-                        pass
-                    else:
-                        # Not a header; use column numbers for dict keys.
-                        fieldnames = list(range(1, len(first_record) + 1))
-                        break
-                else:
-                    # Has a header; use its field names.
-                    fieldnames = None
-                reader = csv.DictReader(
-                    io.StringIO(content), fieldnames=fieldnames, dialect="excel"
-                )
-                records = []
-                # Special case for CSV: empty string converted to None.
-                for record in reader:
-                    for key, value in record.items():
-                        if value == "":
-                            record[key] = None
-                    records.append(record)
+    def parse_content(self, content):
+        "Parse the JSON or YAML content. Return the list of records."
+        match self.format:
 
             case "json":
                 try:
@@ -144,23 +200,113 @@ class Datasource:
 
             case "yaml":
                 try:
-                    records = yaml.safe_load(content)
+                    records = utils.load_yaml(content)
                     if not isinstance(records, list):
                         raise ValueError("YAML data is not a list")
                 except (yaml.YAMLError, ValueError) as error:
                     raise ValueError(f"cannot interpret data as YAML: {error}")
 
-        for record in records:
-            data = {}
-            # Pick out only relevant data items; apply field key map if defined.
-            for key in self.record_class.fields:
-                field = self.map.get(key, key)
-                if isinstance(field, dict):
-                    value = record.get(field["field"])
-                    data[key] = field["map"].get(value, value)
-                else:
-                    data[key] = record.get(field)
-            self.add(data)
+        return records
+
+    def read_csv(self):
+        """Read the CSV or TSV data in a single pass over the open file or the
+        streamed web resource, adding each record as its row is read.
+        """
+        if urllib.parse.urlparse(self.source).scheme:  # Probably http or https.
+            with web.stream(self.source) as (infile, validator, size):
+                key = (self.source, validator) if validator else None
+                self.add_rows(infile, key, size)
+        else:
+            try:
+                key = cache.get_file_key(self.source)
+                infile = open(self.source, newline="")
+            except OSError as error:
+                raise ValueError(str(error))
+            with infile:
+                self.add_rows(infile, key, os.fstat(infile.fileno()).st_size)
+
+    def add_rows(self, infile, key, size=None):
+        """Add the records from the rows of CSV or TSV data in the file, or from
+        the cached rows for the key, if any. The rows are cached only if the
+        size of the data in bytes is known before reading, and is at most
+        'constants.DATASOURCE_CACHE_BYTES'; else no rows are kept while reading.
+        """
+        self.fingerprint = (key, self.format) if key else None
+        rows = _records.get(self.fingerprint) if self.fingerprint else None
+        if rows is None:
+            dialect = "excel" if self.format == "csv" else "excel-tab"
+            rows = csv.reader(infile, dialect=dialect)
+            if (
+                self.fingerprint
+                and size is not None
+                and size <= constants.DATASOURCE_CACHE_BYTES
+            ):
+                cached = []
+            else:
+                cached = None
+        else:
+            cached = None
+        rows = (row for row in rows if row)  # Skip blank lines.
+
+        # Check if the content has a header.
+        # Heuristic: Is first value interpretable as float, then not a header.
+        # (Tried 'csv.Sniffer' but it didn't behave well.)
+        first_row = next(rows, None)
+        if first_row is None:
+            if cached is not None:
+                _records.set(self.fingerprint, cached)
+            return
+        if cached is not None:
+            cached.append(first_row)
+        for part in first_row:
+            try:
+                float(part)
+            except ValueError:
+                pass
+            else:
+                # Not a header; use column numbers for dict keys.
+                fieldnames = list(range(1, len(first_row) + 1))
+                rows = itertools.chain([first_row], rows)
+                break
+        else:
+            # Has a header; use its field names.
+            fieldnames = first_row
+
+        # The column position of each relevant field.
+        positions = {fieldname: pos for pos, fieldname in enumerate(fieldnames)}
+        fields = [
+            (key, positions.get(name), mapping)
+            for key, name, mapping in self.get_fields()
+        ]
+
+        chunk = []
+        for row in rows:
+            if cached is not None and row is not first_row:
+                cached.append(row)
+            chunk.append(row)
+            if len(chunk) == constants.DATASOURCE_CHUNK_SIZE:
+                self.add_rows_chunk(chunk, fields)
+                chunk = []
+        if chunk:
+            self.add_rows_chunk(chunk, fields)
+        if cached is not None:
+            _records.set(self.fingerprint, cached)
+
+    def add_rows_chunk(self, rows, fields):
+        """Add the records from the rows of CSV or TSV data. The fields are given
+        as tuples of field name, column position, if any, and value map, if any.
+        """
+        columns = {}
+        for key, pos, mapping in fields:
+            if pos is None:
+                columns[key] = [None] * len(rows)
+                continue
+            # Special case for CSV: empty string converted to None.
+            values = [(row[pos] or None) if pos < len(row) else None for row in rows]
+            if mapping is not None:
+                values = [mapping.get(value, value) for value in values]
+            columns[key] = values
+        self.add_columns(columns)
 
     def as_dict(self):
         result = dict(source=self.source)
@@ -173,3 +319,92 @@ class Datasource:
             if self.map:
                 result["map"] = self.map
         return result
+
+
+def convert_column(key, values, functions):
+    """Convert and check the values of the field for a batch of records,
+    according to its functions: 'required', 'convert', the numeric range given
+    by 'minimum', 'exclusive_minimum' and 'maximum', and 'check'. The range is
+    checked for the column as a whole, and 'check' is called once for each
+    distinct value. Return a tuple of the list of converted values and None.
+    If any value is invalid, return a tuple of None and the index of the first
+    invalid value along with the error message.
+    """
+    errors = []
+    if functions.get("required") and None in values:
+        errors.append((values.index(None), f"missing value for '{key}'"))
+
+    # Values after the first one failing conversion are not checked.
+    if convert := functions.get("convert"):
+        try:
+            converted = [value if value is None else convert(value) for value in values]
+        except (ValueError, TypeError):
+            converted = []
+            for value in values:
+                try:
+                    converted.append(value if value is None else convert(value))
+                except (ValueError, TypeError) as error:
+                    errors.append((len(converted), str(error)))
+                    break
+    else:
+        converted = values
+
+    minimum = functions.get("minimum")
+    exclusive_minimum = functions.get("exclusive_minimum")
+    maximum = functions.get("maximum")
+    if minimum is not None or exclusive_minimum is not None or maximum is not None:
+
+        def in_range(value):
+            "Is the value in range? NaN is not."
+            return (
+                (minimum is None or value >= minimum)
+                and (exclusive_minimum is None or value > exclusive_minimum)
+                and (maximum is None or value <= maximum)
+            )
+
+        numbers = [value for value in converted if value is not None]
+        try:
+            valid = not numbers or (
+                in_range(min(numbers))
+                and in_range(max(numbers))
+                and not any(map(math.isnan, numbers))
+            )
+        except TypeError:
+            valid = False
+        if not valid:
+            for index, value in enumerate(converted):
+                try:
+                    if value is None or in_range(value):
+                        continue
+                    message = f"invalid value '{values[index]}'"
+                except TypeError as error:
+                    message = str(error)
+                errors.append((index, message))
+                break
+
+    if check := functions.get("check"):
+        results = {}  # Key: distinct value; value: True or error message.
+        for index, value in enumerate(converted):
+            if value is None:
+                continue
+            try:
+                result = results[value]
+            except KeyError:
+                result = results[value] = check_value(check, value)
+            except TypeError:  # Unhashable value.
+                result = check_value(check, value)
+            if result is not True:
+                errors.append((index, result or f"invalid value '{values[index]}'"))
+                break
+
+    if errors:
+        return None, min(errors)
+    return converted, None
+
+
+def check_value(check, value):
+    "Return True if the value passes the check, else the error message, if any."
+    try:
+        return True if check(value) else None
+    except (ValueError, TypeError) as error:
+        return str(error)
@@ -1,6 +1,7 @@
 "Dimension classes."
 
 from dataclasses import dataclass
+import array
 import itertools
 import math
 
@@ -30,27 +31,17 @@ class Dimension:
         self.max = None
 
     def update_span(self, value):
-        "Update current min and max values."
-        assert isinstance(value, (int, float)) or isinstance(value, (tuple, list))
-
-        if self.min is None:
-            if isinstance(value, (tuple, list)):
-                self.min = min(*value)
-            else:
-                self.min = value
-        elif isinstance(value, (tuple, list)):
-            self.min = min(self.min, *value)
-        else:
-            self.min = min(self.min, value)
-        if self.max is None:
-            if isinstance(value, (tuple, list)):
-                self.max = max(*value)
-            else:
-                self.max = value
-        elif isinstance(value, (tuple, list)):
-            self.max = max(self.max, *value)
-        else:
-            self.max = max(self.max, value)
+        "Update current min and max values from a number or a sequence of numbers."
+        if isinstance(value, (int, float)):
+            value = [value]
+        assert isinstance(value, (tuple, list, array.array))
+        if not value:
+            return
+
+        low = min(value)
+        high = max(value)
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
 
     def expand_span(self, fraction):
         expansion = fraction * (self.max - self.min)
@@ -1,13 +1,30 @@
-"All chart classes."
-
-from timelines import Timelines
-from piechart import Piechart
-from scatter2d import Scatter2d
-from lines2d import Lines2d
-from note import Note
-from column import Column
-from row import Row
-from overlay import Overlay
-from board import Board
-
-# from dendrogram import Dendrogram
+"""All chart classes. The module defining a chart class is imported when
+the class is first accessed, since importing all of them takes time.
+"""
+
+import importlib
+
+# Chart classes and the modules defining them.
+_modules = dict(
+    Timelines="timelines",
+    Piechart="piechart",
+    Scatter2d="scatter2d",
+    Lines2d="lines2d",
+    Note="note",
+    Column="column",
+    Row="row",
+    Overlay="overlay",
+    Board="board",
+    # Dendrogram="dendrogram",
+)
+
+__all__ = list(_modules)
+
+
+def __getattr__(name):
+    try:
+        module = importlib.import_module(_modules[name])
+    except KeyError:
+        raise AttributeError(f"module 'lib' has no attribute '{name}'")
+    globals()[name] = cls = getattr(module, name)
+    return cls
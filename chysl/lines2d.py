@@ -9,6 +9,7 @@ from datasource import Datasource
 from dimension import Xdimension, Ydimension, Axis, Grid
 from minixml import Element
 from path import Path
+from table import Table
 from utils import N
 
 
@@ -208,10 +209,17 @@ class Lines2d(Chart):
             line["datasource"] = Datasource(line["line"], Point2d)
             line["line"] = line["datasource"].data
         else:
-            for pos, data in enumerate(line["line"]):
-                line["line"][pos] = Point2d(**data)
+            points = Table(Point2d)
+            for point in line["line"]:
+                if isinstance(point, dict) and not schema.is_trusted():
+                    point = schema.create(Point2d, point)  # Checks the values.
+                points.append(point)
+            line["line"] = points
         self.lines.append(line)
 
+    def get_datasources(self):
+        return [line["datasource"] for line in self.lines if "datasource" in line]
+
     def as_dict(self):
         result = super().as_dict()
         if self.width != self.DEFAULT_WIDTH:
@@ -250,34 +258,34 @@ class Lines2d(Chart):
             lines.append(item)
         return result
 
-    def build(self):
+    def build(self, context):
         "Create the SVG elements in the 'svg' attribute."
-        super().build()
+        super().build(context)
 
         xdimension = Xdimension(self.width, self.xaxis)
         for line in self.lines:
-            xdimension.update_span([p.x for p in line["line"]])
+            xdimension.update_span(line["line"].get_column("x"))
         xdimension.expand_span(0.05)
         xdimension.build()
 
         ydimension = Ydimension(self.height, self.yaxis, reversed=True)
         for line in self.lines:
-            ydimension.update_span([p.y for p in line["line"]])
+            ydimension.update_span(line["line"].get_column("y"))
         ydimension.expand_span(0.05)
         ydimension.build()
 
         layout = Layout(rows=2, columns=2, title=self.title)
         layout.add(0, 0, ydimension.get_labels(self.height))
         layout.add(0, 1, self.frame.get_element(self.width, self.height))
-        layout.add(0, 1, self.get_plot(xdimension, ydimension))
+        layout.add(0, 1, self.get_plot(xdimension, ydimension, context))
         layout.add(1, 1, xdimension.get_labels(self.width))
         self.svg.load_layout(layout)
 
-    def get_plot(self, xdimension, ydimension):
+    def get_plot(self, xdimension, ydimension, context):
         "Get the element for the chart plot area, grid and points."
         result = Element("g")
         result["class"] = "plot"
-        clippath_id = next(utils.unique_id)
+        clippath_id = context.new_id()
         result["clip-path"] = f"url(#{clippath_id})"
         result.total_width = self.width
         result.total_height = self.height
@@ -310,11 +318,11 @@ class Lines2d(Chart):
         graphics["stroke-linecap"] = "round"
 
         for line in self.lines:
-            points = []
-            for p in line["line"]:
-                points.append(
-                    f"{N(xdimension.get_pixel(p.x))} {N(ydimension.get_pixel(p.y))}"
-                )
+            xs = [xdimension.get_pixel(x) for x in line["line"].get_column("x")]
+            ys = [ydimension.get_pixel(y) for y in line["line"].get_column("y")]
+            xs = utils.format_numbers(xs)
+            ys = utils.format_numbers(ys)
+            points = [f"{x} {y}" for x, y in zip(xs, ys)]
             elem = Element("polyline", points=",".join(points))
             if (thickness := line.get("thickness")) is not None:
                 elem["stroke-width"] = thickness
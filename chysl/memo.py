@@ -1,34 +1,62 @@
-"""Singleton set for detecting cyclical references in YAML include operations.
-This probably won't work in multi-threaded situations.
+"""Detection of cyclical references in YAML include operations, and recording
+of the files and web resources a chart depends on.
+The stack of locations being included and the set of recorded locations are
+kept in context variables, so that charts may be read concurrently in threads
+or asyncio tasks.
 """
 
-_memo = set()
-
-
-def clear():
-    global _memo
-    _memo.clear()
-
-
-def check(key):
-    global _memo
-    key = repr(key)
-    if key in _memo:
-        raise ValueError
-
-
-def add(key):
-    global _memo
-    key = repr(key)
-    _memo.add(key)
-
-
-def check_add(key):
-    check(key)
-    add(key)
-
-
-def remove(key):
-    global _memo
-    key = repr(key)
-    _memo.remove(key)
+import contextlib
+import contextvars
+
+# The locations of the charts currently being included, outermost first.
+_stack = contextvars.ContextVar("include_stack", default=())
+
+# The set of locations read and the check function while recording, else None.
+_dependencies = contextvars.ContextVar("dependencies", default=None)
+
+
+@contextlib.contextmanager
+def including(location):
+    """Context for reading the chart at the location, which is pushed onto
+    the stack of includes. Raises ValueError if the location is already on it.
+    """
+    stack = _stack.get()
+    if location in stack:
+        cycle = " -> ".join(stack[stack.index(location) :] + (location,))
+        raise ValueError(f"cycle of includes: {cycle}")
+    token = _stack.set(stack + (location,))
+    try:
+        yield
+    finally:
+        _stack.reset(token)
+
+
+def get_stack():
+    "Return the locations of the charts currently being included, outermost first."
+    return _stack.get()
+
+
+@contextlib.contextmanager
+def recording(check=None):
+    """Context in which the locations of all charts and datasources read
+    are recorded. Yields the set of locations, which is filled in as they are read.
+    If 'check' is given, it is called with each location before it is read,
+    and may raise ValueError to refuse it.
+    """
+    result = set()
+    token = _dependencies.set((result, check))
+    try:
+        yield result
+    finally:
+        _dependencies.reset(token)
+
+
+def depend(location):
+    """Record that the location is read, if within a recording context.
+    Raises ValueError if the location is refused by the check of the context.
+    """
+    if (recorder := _dependencies.get()) is not None:
+        dependencies, check = recorder
+        if check:
+            check(str(location))
+        dependencies.add(str(location))
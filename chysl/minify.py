@@ -0,0 +1,291 @@
+"Minification of the SVG element tree."
+
+import re
+
+from minixml import Element
+
+# Inherited properties and their initial values.
+INHERITED = {
+    "fill": "black",
+    "fill-opacity": "1",
+    "stroke": "none",
+    "stroke-width": "1",
+    "stroke-opacity": "1",
+    "stroke-linecap": "butt",
+    "stroke-linejoin": "miter",
+    "font-style": "normal",
+    "font-weight": "normal",
+    "text-anchor": "start",
+}
+
+# Non-inherited attributes and their default values, for the given elements.
+DEFAULTS = {
+    "opacity": ("1", None),
+    "x": ("0", ("rect", "text", "use", "image")),
+    "y": ("0", ("rect", "text", "use", "image")),
+    "cx": ("0", ("circle", "ellipse")),
+    "cy": ("0", ("circle", "ellipse")),
+    "x1": ("0", ("line",)),
+    "y1": ("0", ("line",)),
+    "x2": ("0", ("line",)),
+    "y2": ("0", ("line",)),
+}
+
+# Elements whose content is rendered where it is referenced, not where it is
+# defined, so that the inherited values of properties are unknown there.
+REFERENCED = ("defs", "symbol", "clipPath", "mask", "marker", "pattern")
+
+# Number of parameters for each path command.
+PATH_COMMANDS = {
+    "M": 2,
+    "L": 2,
+    "H": 1,
+    "V": 1,
+    "C": 6,
+    "S": 4,
+    "Q": 4,
+    "T": 2,
+    "A": 7,
+    "Z": 0,
+}
+
+PATH_TOKEN = re.compile(
+    r"[MLHVCSQTAZmlhvcsqtaz]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+)
+
+NUMBER = re.compile(r"-?\d*\.\d+|-?\d+")
+
+
+def minify_document(document):
+    """Reduce the size of the element tree without changing the rendering:
+    - Remove attributes having the value they would inherit anyway.
+    - Remove attributes having their default value.
+    - Remove the leading zero of decimal numbers in attributes.
+    - Shorten path data using relative commands when shorter, and implicit repeats.
+    """
+    assert isinstance(document, Element)
+
+    # Each stack item: element and the values of inherited properties for it.
+    # The inherited values are None when they are unknown.
+    stack = [(document, dict(INHERITED))]
+    while stack:
+        elem, inherited = stack.pop()
+        if inherited is not None:
+            for name, value in inherited.items():
+                if elem.get(name) == value:
+                    del elem[name]
+            inherited = inherited.copy()
+            for name in INHERITED:
+                if name in elem:
+                    inherited[name] = elem[name]
+        for name, (value, tags) in DEFAULTS.items():
+            if elem.get(name) == value and (tags is None or elem.tag in tags):
+                del elem[name]
+        for name, value in list(elem.attrs.items()):
+            if name == "d":
+                elem[name] = minify_path(value)
+            elif name == "points":
+                elem[name] = NUMBER.sub(
+                    lambda m: format_number(float(m[0]), decimals(m[0])), value
+                )
+            elif NUMBER.fullmatch(value):
+                elem[name] = format_number(float(value), decimals(value))
+        if elem.tag in REFERENCED:
+            inherited = None
+        for subelement in elem:
+            if isinstance(subelement, Element):
+                stack.append((subelement, inherited))
+
+
+def minify_path(d):
+    """Return the shortest form of the path data that this function can produce.
+    Each segment is given in absolute or relative coordinates, whichever is shorter,
+    and repeated commands are made implicit. Returns the path data unchanged
+    if it cannot be parsed.
+    """
+    try:
+        segments = parse_path(d)
+    except ValueError:
+        return d
+    precision = max(
+        [decimals(t) for t in PATH_TOKEN.findall(d) if not t.isalpha()], default=0
+    )
+
+    result = []
+    previous = None  # The previous command output.
+    last = None  # The last number output, if directly preceding.
+    x = y = 0  # The current point, as given by the output so far.
+    x0 = y0 = 0  # The start of the current subpath.
+    for command, values in segments:
+        if command == "Z":
+            result.append("z")
+            previous = "z"
+            last = None
+            x, y = x0, y0
+            continue
+
+        # Output the segment in absolute or relative coordinates, whichever shorter.
+        absolute = [format_number(v, precision) for v in values]
+        relative = get_relative(command, values, x, y, precision)
+        alternatives = [(command, absolute), (command.lower(), relative)]
+        # A lineto may be horizontal or vertical.
+        if command == "L":
+            if relative[1] == "0":
+                alternatives.append(("H", absolute[:1]))
+                alternatives.append(("h", relative[:1]))
+            elif relative[0] == "0":
+                alternatives.append(("V", absolute[1:]))
+                alternatives.append(("v", relative[1:]))
+        candidates = []
+        for letter, parameters in alternatives:
+            if is_implicit(letter, previous):
+                text = join_numbers(parameters, last=last)
+            else:
+                text = letter + join_numbers(parameters)
+            candidates.append((len(text), letter, text, parameters))
+        length, letter, text, parameters = min(candidates)
+        result.append(text)
+        previous = letter
+        last = parameters[-1]
+
+        # Update the current point from the output, to avoid accumulated error.
+        match letter:
+            case "H":
+                x = float(parameters[0])
+            case "h":
+                x += float(parameters[0])
+            case "V":
+                y = float(parameters[0])
+            case "v":
+                y += float(parameters[0])
+            case _ if letter.isupper():
+                x, y = float(parameters[-2]), float(parameters[-1])
+            case _:
+                x += float(parameters[-2])
+                y += float(parameters[-1])
+        if letter in "Mm":
+            x0, y0 = x, y
+
+    return "".join(result)
+
+
+def get_relative(command, values, x, y, precision):
+    "Return the formatted values of the segment relative to the current point."
+    match command:
+        case "H":
+            return [format_number(values[0] - x, precision)]
+        case "V":
+            return [format_number(values[0] - y, precision)]
+        case "A":
+            return [format_number(v, precision) for v in values[:5]] + [
+                format_number(values[5] - x, precision),
+                format_number(values[6] - y, precision),
+            ]
+        case _:
+            return [
+                format_number(v - (y if pos % 2 else x), precision)
+                for pos, v in enumerate(values)
+            ]
+
+
+def parse_path(d):
+    """Parse the path data into a list of segments, each a tuple of command
+    (upper case) and its values in absolute coordinates.
+    Raise ValueError if the path data is invalid.
+    """
+    tokens = PATH_TOKEN.findall(d)
+    if "".join(tokens) != re.sub(r"[\s,]+", "", d):
+        raise ValueError("invalid characters in path data")
+    result = []
+    x = y = 0
+    x0 = y0 = 0
+    pos = 0
+    command = None
+    while pos < len(tokens):
+        if tokens[pos].isalpha():
+            command = tokens[pos]
+            pos += 1
+        elif command is None:
+            raise ValueError("path data must start with a command")
+        elif command in "Mm":  # Implicit repeat of moveto is lineto.
+            command = "L" if command == "M" else "l"
+        elif command in "Zz":
+            raise ValueError("number after closepath")
+        upper = command.upper()
+        count = PATH_COMMANDS[upper]
+        values = [float(t) for t in tokens[pos : pos + count]]  # Fails on command.
+        if len(values) != count:
+            raise ValueError("missing path data values")
+        pos += count
+        if command.islower():
+            match upper:
+                case "H":
+                    values[0] += x
+                case "V":
+                    values[0] += y
+                case "A":
+                    values[5] += x
+                    values[6] += y
+                case _:
+                    for i in range(0, count, 2):
+                        values[i] += x
+                        values[i + 1] += y
+        match upper:
+            case "Z":
+                x, y = x0, y0
+            case "H":
+                x = values[0]
+            case "V":
+                y = values[0]
+            case _:
+                x, y = values[-2], values[-1]
+        if upper == "M":
+            x0, y0 = x, y
+        result.append((upper, values))
+    return result
+
+
+def is_implicit(letter, previous):
+    "May the command letter be omitted after the previous command?"
+    if previous is None or previous in "Zz":
+        return False
+    if letter == previous:
+        return letter not in "Mm"
+    return (previous, letter) in (("M", "L"), ("m", "l"))
+
+
+def join_numbers(numbers, last=None):
+    """Join the formatted numbers using the minimal number of separators.
+    The last number output before these, if directly preceding, must be given.
+    """
+    result = []
+    for number in numbers:
+        if last is not None:
+            if not (number.startswith("-") or (number.startswith(".") and "." in last)):
+                result.append(" ")
+        result.append(number)
+        last = number
+    return "".join(result)
+
+
+def decimals(token):
+    "Return the number of decimals required to represent the number token."
+    mantissa, _, exponent = token.lower().partition("e")
+    result = len(mantissa.partition(".")[2])
+    if exponent:
+        result -= int(exponent)
+    return max(result, 0)
+
+
+def format_number(value, precision):
+    "Return the shortest string for the value at the given precision."
+    result = f"{value:.{precision}f}"
+    if "." in result:
+        result = result.rstrip("0").rstrip(".")
+    if result.startswith("0."):
+        result = result[1:]
+    elif result.startswith("-0."):
+        result = "-" + result[2:]
+    elif result == "-0":
+        result = "0"
+    return result
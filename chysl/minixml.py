@@ -7,20 +7,39 @@ import io
 import xml.sax
 import xml.sax.saxutils
 
+# Approximate size (characters) of the chunks when writing XML.
+CHUNK_SIZE = 65536
+
 
 class Element:
-    "XML element. Contains a reference to superelement and subelements (if any)."
+    """XML element. Contains a reference to superelement and subelements (if any).
+    Uses slots to keep the memory footprint small for large trees. The attributes
+    dictionary and the subelements list are allocated only when first needed.
+    The 'total_width' and 'total_height' layout fields are unset until assigned.
+    """
+
+    __slots__ = (
+        "tag",
+        "superelement",
+        "_attrs",
+        "_subelements",
+        "total_width",
+        "total_height",
+    )
 
     repr_indent = 2
     xml_decl = True
 
     def __init__(self, tag, *subelements, **attrs):
         self.tag = tag
-        self.attrs = {}
-        for name, value in attrs.items():
-            self[name] = value
         self.superelement = None
-        self.subelements = []
+        self._subelements = None
+        if attrs:
+            self._attrs = {}
+            for name, value in attrs.items():
+                self[name] = value
+        else:
+            self._attrs = None
         for subelement in subelements:
             self.append(subelement)
 
@@ -28,7 +47,7 @@ class Element:
         "Return the string representation of the element's starting tag."
         outfile = io.StringIO()
         outfile.write(f"<{self.tag}")
-        for name, value in self.attrs.items():
+        for name, value in (self._attrs or {}).items():
             outfile.write(f" {name}={xml.sax.saxutils.quoteattr(value)}")
         if len(self):
             outfile.write(">")
@@ -38,43 +57,48 @@ class Element:
 
     def __repr__(self):
         "Return the string representation of the element and its subelements."
-        outfile = io.StringIO()
-        self.write(
-            outfile, indent=self.repr_indent, xml_decl=self.xml_decl and self.depth == 0
+        return "".join(
+            self.generate(
+                indent=self.repr_indent, xml_decl=self.xml_decl and self.depth == 0
+            )
         )
-        return outfile.getvalue()
 
     def __getitem__(self, key):
         "Get the value of the attribute in this element."
         try:
-            return self.attrs[key]
-        except KeyError:
+            return self._attrs[key]
+        except (KeyError, TypeError):
             raise KeyError(f"no such attribute '{key}' in element")
 
     def __setitem__(self, key, value):
         "Set the value of the attribute in this element."
         if not isinstance(value, str):
             value = str(value)
-        self.attrs[key] = value
+        if self._attrs is None:
+            self._attrs = {}
+        self._attrs[key] = value
 
     def __delitem__(self, key):
         "Delete the attribute in this element."
         try:
-            del self.attrs[key]
-        except KeyError:
+            del self._attrs[key]
+        except (KeyError, TypeError):
             raise KeyError(f"no such attribute '{key}' in element")
 
     def __contains__(self, key):
         "Does this element have the given attribute?"
-        return key in self.attrs
+        return self._attrs is not None and key in self._attrs
 
     def __iter__(self):
         "Iterate over the subelements of this element."
-        yield from self.subelements
+        if self._subelements:
+            yield from self._subelements
 
     def __len__(self):
         "Return the number of subelements of this element."
-        return len(self.subelements)
+        if self._subelements is None:
+            return 0
+        return len(self._subelements)
 
     def __eq__(self, other):
         "Are the element and its subelements equal? Ignores the superelement."
@@ -82,11 +106,11 @@ class Element:
             return False
         if self.tag != other.tag:
             return False
-        if self.attrs != other.attrs:
+        if (self._attrs or {}) != (other._attrs or {}):
             return False
         if len(self) != len(other):
             return False
-        for subelement1, subelement2 in zip(self.subelements, other.subelements):
+        for subelement1, subelement2 in zip(self, other):
             if subelement1 != subelement2:
                 return False
         return True
@@ -95,6 +119,20 @@ class Element:
         self.append(other)
         return self
 
+    @property
+    def attrs(self):
+        "The dictionary of attributes of this element."
+        if self._attrs is None:
+            self._attrs = {}
+        return self._attrs
+
+    @property
+    def subelements(self):
+        "The list of subelements of this element."
+        if self._subelements is None:
+            self._subelements = []
+        return self._subelements
+
     def get(self, key, default=None):
         "Return the value of the given attribute in this element, or the default."
         try:
@@ -179,47 +217,109 @@ class Element:
         yielding those elements that match the given test function.
         If no test function given, yield all.
         """
-        if test is None or test(self):
-            yield self
-        for subelement in self:
-            if not isinstance(subelement, Element):
-                continue
-            yield from subelement.walk(test=test)
-
-    def write(self, outfile, indent=None, xml_decl=False):
-        "Write the XML of the element and its subelements into the open file object."
+        stack = [self]
+        while stack:
+            elem = stack.pop()
+            if test is None or test(elem):
+                yield elem
+            if elem._subelements:
+                stack.extend(
+                    reversed([e for e in elem._subelements if isinstance(e, Element)])
+                )
+
+    def write(
+        self,
+        outfile,
+        indent=None,
+        xml_decl=False,
+        compact=False,
+        chunk_size=CHUNK_SIZE,
+    ):
+        """Write the XML of the element and its subelements into the open file object.
+        The XML is written in chunks, without first creating the entire string.
+        """
+        for chunk in self.iter_chunks(
+            indent=indent, xml_decl=xml_decl, compact=compact, chunk_size=chunk_size
+        ):
+            outfile.write(chunk)
+
+    def iter_chunks(
+        self, indent=None, xml_decl=False, compact=False, chunk_size=CHUNK_SIZE
+    ):
+        """Generate the XML of the element and its subelements in chunks
+        of approximately the given size (characters).
+        """
+        buffer = []
+        size = 0
+        for piece in self.generate(indent=indent, xml_decl=xml_decl, compact=compact):
+            buffer.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                yield "".join(buffer)
+                buffer.clear()
+                size = 0
+        if buffer:
+            yield "".join(buffer)
+
+    def generate(self, indent=None, xml_decl=False, compact=False):
+        """Generate the pieces of the XML of the element and its subelements.
+        Uses an explicit stack instead of recursion, so that very deep trees
+        can be handled, and the indentation is passed down instead of computed.
+        If 'compact' is true, empty elements are closed by '/>' without a space.
+        """
         if xml_decl:
-            outfile.write(f'<?xml version="1.0"?>\n')
+            yield f'<?xml version="1.0"?>\n'
+        quoteattr = xml.sax.saxutils.quoteattr
+        empty_close = "/>" if compact else " />"
+        escape = xml.sax.saxutils.escape
         if indent is None:
+            step = ""
             padding = ""
         else:
-            padding = " " * indent * self.depth
-        outfile.write(padding)
-        outfile.write(f"<{self.tag}")
-        for name, value in self.attrs.items():
-            outfile.write(f" {name}={xml.sax.saxutils.quoteattr(value)}")
-        if len(self):
-            outfile.write(">")
-            newline = False
-            for elem in self:
-                if isinstance(elem, Element):
-                    if indent:
-                        outfile.write("\n")
-                    elem.write(outfile, indent=indent)
-                    newline = True
-                elif isinstance(elem, str):
-                    outfile.write(xml.sax.saxutils.escape(elem))
-                    newline = False
+            step = " " * indent
+            padding = step * self.depth
+        # Each stack item: element, its padding, iterator over its subelements,
+        # and whether the last subelement written was an element.
+        stack = []
+        elem = self
+        while True:
+            yield padding
+            yield f"<{elem.tag}"
+            if elem._attrs:
+                for name, value in elem._attrs.items():
+                    yield f" {name}={quoteattr(value)}"
+            if elem._subelements:
+                yield ">"
+                stack.append([elem, padding, iter(elem._subelements), False])
+            else:
+                yield empty_close
+            elem = None
+            while stack:
+                item = stack[-1]
+                for subelement in item[2]:
+                    if isinstance(subelement, Element):
+                        if indent:
+                            yield "\n"
+                        item[3] = True
+                        elem = subelement
+                        padding = item[1] + step
+                        break
+                    elif isinstance(subelement, str):
+                        yield escape(subelement)
+                    else:
+                        yield escape(str(subelement))
+                    item[3] = False
                 else:
-                    outfile.write(xml.sax.saxutils.escape(str(elem)))
-                    newline = False
-            if newline:
-                if indent:
-                    outfile.write("\n")
-                outfile.write(padding)
-            outfile.write(f"</{self.tag}>")
-        else:
-            outfile.write(" />")
+                    stack.pop()
+                    if item[3]:
+                        if indent:
+                            yield "\n"
+                        yield item[1]
+                    yield f"</{item[0].tag}>"
+                    continue
+                break
+            if elem is None:
+                break
 
 
 class ContentHandler(xml.sax.ContentHandler):
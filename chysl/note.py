@@ -113,9 +113,9 @@ class Note(Chart):
             result["width"] = self.width
         return result
 
-    def build(self):
+    def build(self, context):
         "Create the SVG elements in the 'svg' attribute."
-        super().build()
+        super().build(context)
 
         note = self.get_note()
         layout = Layout(rows=1, columns=1)
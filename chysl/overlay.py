@@ -86,6 +86,9 @@ class Overlay(Chart):
         opacity = 1 if opacity is None else opacity
         self.layers.append([subchart, opacity])
 
+    def get_subcharts(self):
+        return [subchart for subchart, opacity in self.layers]
+
     def as_dict(self):
         result = super().as_dict()
         result["layers"] = []
@@ -99,13 +102,13 @@ class Overlay(Chart):
                 layer["subchart"] = subchart.as_dict()
         return result
 
-    def build(self):
+    def build(self, context):
         "Create the SVG elements in the 'svg' attribute."
-        super().build()
+        super().build(context)
         layout = Layout(rows=1, columns=1, title=self.title)
 
         for subchart, opacity in self.layers:
-            subchart.build()
+            subchart.build(context)
             element = Element("g", *list(subchart.svg))
             element["class"] = "subchart"
             if opacity != 1:
@@ -143,7 +143,8 @@ class Piechart(Chart):
 
         if isinstance(slices, dict):
             self.datasource = Datasource(slices, Slice)
-            self.slices = self.datasource.data
+            # Slices are few, and are modified when rendered; not kept in a table.
+            self.slices = list(self.datasource.data)
         else:
             self.datasource = None
             self.slices = []
@@ -158,9 +159,12 @@ class Piechart(Chart):
     def add(self, slice):
         assert isinstance(slice, (dict, Slice))
         if isinstance(slice, dict):
-            slice = Slice(**slice)
+            slice = schema.create(Slice, slice)
         self.slices.append(slice)
 
+    def get_datasources(self):
+        return [self.datasource] if self.datasource else []
+
     def as_dict(self):
         result = super().as_dict()
         if self.diameter != self.DEFAULT_DIAMETER:
@@ -180,14 +184,14 @@ class Piechart(Chart):
                 slices.append(slice.as_dict())
         return result
 
-    def build(self):
+    def build(self, context):
         "Create the SVG elements in the 'svg' attribute."
-        super().build()
+        super().build(context)
         layout = Layout(rows=1, columns=1, title=self.title)
-        layout.add(0, 0, self.get_plot())
+        layout.add(0, 0, self.get_plot(context))
         self.svg.load_layout(layout)
 
-    def get_plot(self):
+    def get_plot(self, context):
         "Get the element for the chart circle (frame) and slices."
         if self.total is None:
             total = sum([s.value for s in self.slices])
@@ -198,7 +202,7 @@ class Piechart(Chart):
 
         result = Element("g")
         result["class"] = "plot"
-        clippath_id = next(utils.unique_id)
+        clippath_id = context.new_id()
         result["clip-path"] = f"url(#{clippath_id})"
         result.total_width = self.diameter
         result.total_height = self.diameter
@@ -264,9 +268,9 @@ register(Piechart)
 class Slice:
     "Slice in a pie chart."
 
-    # Fields, with converter and checker functions.
+    # Fields, with converter and checker functions, and numeric ranges.
     fields = dict(
-        value=dict(convert=float, check=lambda v: v > 0, required=True),
+        value=dict(convert=float, exclusive_minimum=0, required=True),
         label=None,
         color=dict(check=lambda c: utils.is_color(c)),
         href=None,
@@ -77,6 +77,9 @@ class Row(Chart):
             subchart = parse(subchart)
         self.subcharts.append(subchart)
 
+    def get_subcharts(self):
+        return list(self.subcharts)
+
     def as_dict(self):
         result = super().as_dict()
         result["subcharts"] = []
@@ -91,9 +94,9 @@ class Row(Chart):
             result["padding"] = self.padding
         return result
 
-    def build(self):
+    def build(self, context):
         "Create the SVG elements in the 'svg' attribute."
-        super().build()
+        super().build(context)
         layout = Layout(
             rows=1,
             columns=len(self.subcharts),
@@ -103,7 +106,7 @@ class Row(Chart):
         )
 
         for pos, subchart in enumerate(self.subcharts):
-            subchart.build()
+            subchart.build(context)
             for element in subchart.svg:
                 layout.add(0, pos, element)
 
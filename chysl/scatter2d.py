@@ -7,9 +7,10 @@ import utils
 from chart import Chart, Layout, register
 from datasource import Datasource
 from dimension import Xdimension, Ydimension, Axis, Grid
-from marker import Marker
+from marker import Marker, Symbols
 from minixml import Element
 from path import Path
+from table import Table
 from utils import N
 
 
@@ -196,7 +197,7 @@ class Scatter2d(Chart):
             self.points = self.datasource.data
         else:
             self.datasource = None
-            self.points = []
+            self.points = Table(Point2d)
             if points:
                 for point in points:
                     self.add(point)
@@ -207,10 +208,13 @@ class Scatter2d(Chart):
 
     def add(self, point):
         assert isinstance(point, (dict, Point2d))
-        if isinstance(point, dict):
-            point = Point2d(**point)
+        if isinstance(point, dict) and not schema.is_trusted():
+            point = schema.create(Point2d, point)  # Checks the values.
         self.points.append(point)
 
+    def get_datasources(self):
+        return [self.datasource] if self.datasource else []
+
     def as_dict(self):
         result = super().as_dict()
         if self.width != self.DEFAULT_WIDTH:
@@ -238,32 +242,35 @@ class Scatter2d(Chart):
                 points.append(point.as_dict())
         return result
 
-    def build(self):
+    def build(self, context):
         "Create the SVG elements in the 'svg' attribute."
-        super().build()
+        super().build(context)
 
         xdimension = Xdimension(self.width, self.xaxis)
-        xdimension.update_span([p.x for p in self.points])
+        xdimension.update_span(self.points.get_column("x"))
         xdimension.expand_span(0.05)
         xdimension.build()
 
         ydimension = Ydimension(self.height, self.yaxis, reversed=True)
-        ydimension.update_span([p.y for p in self.points])
+        ydimension.update_span(self.points.get_column("y"))
         ydimension.expand_span(0.05)
         ydimension.build()
 
         layout = Layout(rows=2, columns=2, title=self.title)
         layout.add(0, 0, ydimension.get_labels(self.height))
         layout.add(0, 1, self.frame.get_element(self.width, self.height))
-        layout.add(0, 1, self.get_plot(xdimension, ydimension))
+        layout.add(0, 1, self.get_plot(xdimension, ydimension, context))
         layout.add(1, 1, xdimension.get_labels(self.width))
         self.svg.load_layout(layout)
 
-    def get_plot(self, xdimension, ydimension):
-        "Get the element for the chart plot area, grid and points."
+    def get_plot(self, xdimension, ydimension, context):
+        """Get the element for the chart plot area, grid and points.
+        If 'symbols' is set in the context, define markers once as symbols
+        and reference them.
+        """
         result = Element("g")
         result["class"] = "plot"
-        clippath_id = next(utils.unique_id)
+        clippath_id = context.new_id()
         result["clip-path"] = f"url(#{clippath_id})"
         result.total_width = self.width
         result.total_height = self.height
@@ -286,28 +293,46 @@ class Scatter2d(Chart):
         if self.ygrid:
             result += ydimension.get_grid(self.width, self.ygrid)
 
+        # Symbol definitions for markers, if used.
+        if context.symbols:
+            registry = Symbols(context)
+            result += registry.defs
+
         # Graphics for points.
         result += (graphics := Element("g"))
         graphics["class"] = "graphics"
         if self.opacity != 1:
             graphics["opacity"] = self.opacity
-        for point in self.points:
+        points = self.points
+        # Pixel coordinates of all points, and their formatted values, at once.
+        xs = [xdimension.get_pixel(x) for x in points.get_column("x")]
+        ys = [ydimension.get_pixel(y) for y in points.get_column("y")]
+        fxs = utils.format_numbers(xs)
+        fys = utils.format_numbers(ys)
+        point_labels = points.get_entries("label")
+        label_x_offsets = {}
+        for index in range(len(points)):
             kwargs = {}
-            if point.opacity is not None:
-                kwargs["opacity"] = point.opacity
-            if point.href:
-                kwargs["href"] = point.href
+            if (opacity := points.get_value("opacity", index)) is not None:
+                kwargs["opacity"] = opacity
+            if href := points.get_value("href", index):
+                kwargs["href"] = href
             marker = Marker(
-                point.marker or self.marker,
-                size=point.size or self.size,
-                color=point.color or self.color,
+                points.get_value("marker", index) or self.marker,
+                size=points.get_value("size", index) or self.size,
+                color=points.get_value("color", index) or self.color,
                 **kwargs,
             )
-            graphics += marker.get_graphic(
-                xdimension.get_pixel(point.x),
-                ydimension.get_pixel(point.y),
-            )
-            point.label_x_offset = marker.label_x_offset
+            x = xs[index]
+            y = ys[index]
+            if context.symbols:
+                graphics += registry.get_graphic(
+                    marker, x, y, fx=fxs[index], fy=fys[index]
+                )
+            else:
+                graphics += marker.get_graphic(x, y, fx=fxs[index], fy=fys[index])
+            if index in point_labels:
+                label_x_offsets[index] = marker.label_x_offset
 
         # Labels for points. After graphics, to render on top.
         result += (labels := Element("g"))
@@ -316,19 +341,13 @@ class Scatter2d(Chart):
         labels["font-size"] = constants.DEFAULT_FONT_SIZE
         labels["text-anchor"] = "start"
 
-        for point in self.points:
-            if point.label:
+        for index, label in point_labels.items():
+            if label:
                 labels += Element(
                     "text",
-                    point.label,
-                    x=N(
-                        xdimension.get_pixel(point.x)
-                        + point.label_x_offset
-                        + self.PADDING
-                    ),
-                    y=N(
-                        ydimension.get_pixel(point.y) + constants.DEFAULT_FONT_SIZE / 4
-                    ),
+                    label,
+                    x=N(xs[index] + label_x_offsets[index] + self.PADDING),
+                    y=N(ys[index] + constants.DEFAULT_FONT_SIZE / 4),
                 )
 
         return result
@@ -340,14 +359,14 @@ register(Scatter2d)
 class Point2d:
     "A point in a 2D scatter chart."
 
-    # Fields, with converter and checker functions.
+    # Fields, with converter and checker functions, and numeric ranges.
     fields = dict(
         x=dict(convert=float, required=True),
         y=dict(convert=float, required=True),
         marker=dict(check=lambda m: m in constants.MARKERS),
-        size=dict(convert=float, check=lambda s: s > 0),
+        size=dict(convert=float, exclusive_minimum=0),
         color=dict(check=lambda c: utils.is_color(c)),
-        opacity=dict(convert=float, check=lambda o: 0 <= o <= 1),
+        opacity=dict(convert=float, minimum=0, maximum=1),
         label=None,
         href=None,
     )
@@ -1,8 +1,15 @@
 "Schema handling."
 
+import contextlib
+import contextvars
+import functools
+import inspect
 import json
+import numbers
 
 import jsonschema
+import referencing
+import referencing.jsonschema
 
 import constants
 
@@ -365,22 +372,215 @@ def find_defs(schema):
     return result
 
 
-def get_validator(schema):
-    format_checker = jsonschema.FormatChecker(["color", "uri-reference"])
+FORMAT_CHECKER = jsonschema.FormatChecker(["color", "uri-reference"])
+
+# How to add more checkers:
+# @FORMAT_CHECKER.checks("color")
+# def color_format(value):
+#     try:
+#         webcolors.normalize_hex(value)
+#     except ValueError:
+#         try:
+#             webcolors.name_to_hex(value)
+#         except ValueError:
+#             return False
+#     return True
+
+# Keywords that do not affect validation.
+ANNOTATIONS = ("title", "description", "default", "$anchor", "$comment", "examples")
+
+# Standard implementation of the 'items' keyword.
+ITEMS = jsonschema.Draft202012Validator.VALIDATORS["items"]
+
+
+def items(validator, items, instance, schema):
+    """Validate the items of an array. Arrays of records are often large and
+    homogeneous, so first try a predicate compiled from the items schema.
+    The standard implementation is used if the predicate cannot be compiled,
+    or if any item fails it, to produce the proper error message.
+    """
+    if validator.is_type(instance, "array") and "prefixItems" not in schema:
+        predicate = get_predicate(items)
+        if predicate is not None and all(map(predicate, instance)):
+            return
+    yield from ITEMS(validator, items, instance, schema)
+
+
+# Validator class with the fast path for arrays of records.
+Validator = jsonschema.validators.extend(
+    jsonschema.Draft202012Validator, validators={"items": items}
+)
+
+# Lookup of compiled predicates, keyed by the identity of the schema.
+# The schema is kept in the value, so that its identity cannot be reused.
+_predicates = {}
+
+
+def get_predicate(schema):
+    """Return the compiled predicate for the schema; created once, and then reused.
+    Return None if the schema contains keywords that cannot be compiled.
+    """
+    try:
+        cached, predicate = _predicates[id(schema)]
+        if cached is schema:
+            return predicate
+    except KeyError:
+        pass
+    predicate = compile_predicate(schema)
+    _predicates[id(schema)] = (schema, predicate)
+    return predicate
+
+
+def compile_predicate(schema):
+    """Return a function which returns True if the instance is valid according
+    to the schema, and False otherwise. Only a subset of the keywords is handled,
+    with the same semantics as in 'jsonschema'. Return None if the schema
+    contains any other keyword which affects validation.
+    """
+    if not isinstance(schema, dict):
+        return None
+    checks = []
+    for keyword, value in schema.items():
+        if keyword in ANNOTATIONS:
+            continue
+        match keyword:
+            case "type":
+                if not set([value] if isinstance(value, str) else value) <= set(TYPES):
+                    return None
+                if isinstance(value, str):
+                    checks.append(TYPES[value])
+                else:
+                    types = [TYPES[n] for n in value]
+                    checks.append(lambda i, t=types: any(f(i) for f in t))
+            case "enum" | "const":
+                values = [value] if keyword == "const" else value
+                # Keep to strings, to avoid the subtleties of equality in JSON.
+                if not all(isinstance(v, str) for v in values):
+                    return None
+                values = frozenset(values)
+                checks.append(lambda i, v=values: isinstance(i, str) and i in v)
+            case "minimum":
+                checks.append(lambda i, v=value: not is_number(i) or i >= v)
+            case "maximum":
+                checks.append(lambda i, v=value: not is_number(i) or i <= v)
+            case "exclusiveMinimum":
+                checks.append(lambda i, v=value: not is_number(i) or i > v)
+            case "exclusiveMaximum":
+                checks.append(lambda i, v=value: not is_number(i) or i < v)
+            case "minLength":
+                checks.append(lambda i, v=value: not isinstance(i, str) or len(i) >= v)
+            case "maxLength":
+                checks.append(lambda i, v=value: not isinstance(i, str) or len(i) <= v)
+            case "format":
+                checks.append(lambda i, v=value: FORMAT_CHECKER.conforms(i, v))
+            case "required":
+                required = tuple(value)
+                checks.append(
+                    lambda i, r=required: not isinstance(i, dict)
+                    or all(k in i for k in r)
+                )
+            case "properties":
+                properties = {}
+                for key, subschema in value.items():
+                    properties[key] = compile_predicate(subschema)
+                    if properties[key] is None:
+                        return None
+                additional = schema.get("additionalProperties", True)
+                if not isinstance(additional, bool) or "patternProperties" in schema:
+                    return None
+                checks.append(
+                    lambda i, p=properties, a=additional: check_properties(i, p, a)
+                )
+            case "additionalProperties":
+                if "properties" not in schema:  # Handled together with 'properties'.
+                    return None
+            case "oneOf":
+                alternatives = [compile_predicate(s) for s in value]
+                if None in alternatives:
+                    return None
+                checks.append(lambda i, a=alternatives: sum(p(i) for p in a) == 1)
+            case "$ref":
+                if not value.startswith("#") or value[1:] not in DEFS:
+                    return None
+                if (predicate := get_predicate(DEFS[value[1:]])) is None:
+                    return None
+                checks.append(predicate)
+            case _ if keyword in jsonschema.Draft202012Validator.VALIDATORS:
+                return None
+            # Unknown keywords are ignored, as in 'jsonschema'.
+    if len(checks) == 1:
+        return checks[0]
+
+    def predicate(instance):
+        for check in checks:
+            if not check(instance):
+                return False
+        return True
+
+    return predicate
+
+
+def is_number(instance):
+    "Is the instance a JSON number? Note that a bool is not."
+    return isinstance(instance, numbers.Number) and not isinstance(instance, bool)
+
+
+def is_integer(instance):
+    "Is the instance a JSON integer? Note that a bool is not, but 1.0 is."
+    if isinstance(instance, float):
+        return instance.is_integer()
+    return isinstance(instance, int) and not isinstance(instance, bool)
+
+
+# Checks for the JSON types, with the same semantics as in 'jsonschema'.
+TYPES = {
+    "number": is_number,
+    "integer": is_integer,
+    "string": lambda i: isinstance(i, str),
+    "boolean": lambda i: isinstance(i, bool),
+    "object": lambda i: isinstance(i, dict),
+    "array": lambda i: isinstance(i, list),
+    "null": lambda i: i is None,
+}
+
+
+def check_properties(instance, properties, additional):
+    "Check the properties of the instance, if it is an object."
+    if not isinstance(instance, dict):
+        return True
+    for key, value in instance.items():
+        predicate = properties.get(key)
+        if predicate is None:
+            if not additional:
+                return False
+        elif not predicate(value):
+            return False
+    return True
 
-    # How to add more checkers:
-    # @format_checker.checks("color")
-    # def color_format(value):
-    #     try:
-    #         webcolors.normalize_hex(value)
-    #     except ValueError:
-    #         try:
-    #             webcolors.name_to_hex(value)
-    #         except ValueError:
-    #             return False
-    #     return True
 
-    return jsonschema.Draft202012Validator(schema=schema, format_checker=format_checker)
+# Lookup of compiled validators, keyed by the identity of the schema.
+# The schema is kept in the value, so that its identity cannot be reused.
+_validators = {}
+
+
+def get_validator(schema):
+    """Return the validator for the schema; created once, and then reused.
+    The registry is crawled beforehand, since otherwise the '$anchor' references
+    would be searched for anew each time they are used during validation.
+    """
+    try:
+        cached, validator = _validators[id(schema)]
+        if cached is schema:
+            return validator
+    except KeyError:
+        pass
+    resource = referencing.jsonschema.DRAFT202012.create_resource(schema)
+    registry = referencing.Registry().with_resource("", resource).crawl()
+    validator = Validator(
+        schema=schema, registry=registry, format_checker=FORMAT_CHECKER
+    )
+    _validators[id(schema)] = (schema, validator)
+    return validator
 
 
 def check_schema(schema):
@@ -405,3 +605,50 @@ def validate(instance, schema, path=None):
             path = list(error.path)
         path = ".".join([str(p) for p in path])
         raise ValueError(f"{error.message} in instance '{path}'")
+
+
+# Is the input trusted, i.e. has it already been validated?
+_trusted = contextvars.ContextVar("trusted", default=False)
+
+
+@contextlib.contextmanager
+def trusted():
+    """Within this context, the input data is trusted to have been validated
+    already, so that the values are not checked again when records are created.
+    """
+    token = _trusted.set(True)
+    try:
+        yield
+    finally:
+        _trusted.reset(token)
+
+
+def is_trusted():
+    "Is the input data trusted to have been validated already?"
+    return _trusted.get()
+
+
+def create(cls, record, trusted=None):
+    """Create an instance of the record class from the dictionary of values.
+    If the input is trusted, bypass '__init__' so that the values are not
+    checked again. This requires that '__init__' only assigns its arguments.
+    If 'trusted' is given, it overrides the current trusted mode.
+    """
+    if trusted is None:
+        trusted = _trusted.get()
+    if not trusted:
+        return cls(**record)
+    result = cls.__new__(cls)
+    result.__dict__.update(get_defaults(cls))
+    result.__dict__.update(record)
+    return result
+
+
+@functools.cache
+def get_defaults(cls):
+    "Return the default values of the arguments to '__init__' of the class."
+    return {
+        name: parameter.default
+        for name, parameter in inspect.signature(cls).parameters.items()
+        if parameter.default is not inspect.Parameter.empty
+    }
@@ -0,0 +1,171 @@
+"""Local HTTP service rendering charts to SVG.
+The process is long-running, so that the compiled schema validators, the
+parsed chart specifications, the datasource records and the text width
+tables stay warm between requests.
+"""
+
+import http.server
+import os
+import threading
+import urllib.parse
+
+import batch
+import cache
+import chart
+import constants
+import memo
+
+# Max size of a chart specification posted to the service.
+MAX_CONTENT_LENGTH = 10 * 1024 * 1024
+
+
+class Server(http.server.ThreadingHTTPServer):
+    """HTTP server rendering charts, restricted to files within the root directory.
+    Web resources are refused, so that the server cannot be made to fetch
+    arbitrary URLs for its clients, except those starting with any of the
+    URL prefixes in 'allowed_urls'.
+    At most 'workers' charts are rendered at the same time; further requests wait.
+    The SVG code is cached in memory, or on disk if 'cachedirpath' is given.
+    Relative paths in the charts are interpreted relative to the current directory,
+    as elsewhere, so that it should usually be the root directory.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        rootdirpath=".",
+        workers=None,
+        quiet=False,
+        cachedirpath=None,
+        allowed_urls=(),
+    ):
+        if workers is None:
+            workers = constants.SERVE_WORKERS
+        assert isinstance(workers, int) and workers >= 1
+        self.rootdirpath = os.path.realpath(rootdirpath)
+        self.allowed_urls = [urllib.parse.urlparse(url) for url in allowed_urls]
+        for parts in self.allowed_urls:
+            assert parts.scheme in ("http", "https") and parts.netloc
+        self.semaphore = threading.BoundedSemaphore(workers)
+        self.quiet = quiet
+        if cachedirpath:
+            self.cache = batch.get_cache(cachedirpath)
+        else:
+            self.cache = cache.LRUCache(constants.RENDER_CACHE_SIZE)
+        batch.warm()
+        super().__init__(address, Handler)
+
+    def is_inside(self, path):
+        "Is the file path within the root directory?"
+        path = os.path.realpath(path)
+        return os.path.commonpath([self.rootdirpath, path]) == self.rootdirpath
+
+    def is_allowed(self, parts):
+        "Does the parsed URL start with any of the allowed URL prefixes?"
+        return any(
+            parts.scheme == allowed.scheme
+            and parts.netloc.lower() == allowed.netloc.lower()
+            and parts.path.startswith(allowed.path)
+            for allowed in self.allowed_urls
+        )
+
+    def check(self, location):
+        """Raise ValueError if the location is a file outside the root directory,
+        or a web resource not allowed.
+        """
+        parts = urllib.parse.urlparse(location)
+        if parts.scheme and parts.scheme != "file":
+            if not self.is_allowed(parts):
+                raise ValueError(f"access denied to '{location}'")
+            return
+        path = urllib.parse.unquote(parts.path) if parts.scheme else location
+        if not self.is_inside(path):
+            raise ValueError(f"access denied to '{location}'")
+
+    def render(self, location, content=None, indent=2, minify=False):
+        """Return the SVG code for the chart at the location, or given by the
+        content. Raises ValueError if the chart is invalid or reads any file
+        outside the root directory.
+        """
+        with self.semaphore, memo.recording(check=self.check):
+            return chart.retrieve(location, content=content).render(
+                indent=indent, minify=minify, cache=self.cache
+            )
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """Render a chart to SVG:
+    - GET the path of a chart file relative to the root directory.
+    - POST a chart specification; JSON if the Content-Type says so, else YAML.
+    The query parameters 'indent' and 'minify' control the output.
+    """
+
+    server_version = f"Chysl/{constants.__version__}"
+
+    def do_GET(self):
+        parts = urllib.parse.urlparse(self.path)
+        relpath = urllib.parse.unquote(parts.path).lstrip("/")
+        filepath = os.path.join(self.server.rootdirpath, relpath)
+        if not relpath or not self.server.is_inside(filepath):
+            self.send_text(403, "access denied")
+        elif not os.path.isfile(filepath):
+            self.send_text(404, "no such chart file")
+        else:
+            self.send_svg(filepath, None, parts.query)
+
+    def do_POST(self):
+        parts = urllib.parse.urlparse(self.path)
+        try:
+            length = int(self.headers["Content-Length"])
+        except (TypeError, ValueError):
+            self.send_text(411, "content length required")
+            return
+        if length > MAX_CONTENT_LENGTH:
+            self.send_text(413, "chart specification too large")
+            return
+        try:
+            content = self.rfile.read(length).decode("utf-8")
+        except UnicodeDecodeError:
+            self.send_text(400, "chart specification is not UTF-8")
+            return
+        if "json" in (self.headers.get_content_type() or ""):
+            location = "request.json"
+        else:
+            location = "request.yaml"
+        self.send_svg(location, content, parts.query)
+
+    def send_svg(self, location, content, query):
+        "Render the chart and send the SVG code, or the error message."
+        query = urllib.parse.parse_qs(query)
+        try:
+            indent = max(0, int(query.get("indent", ["2"])[0]))
+        except ValueError:
+            self.send_text(400, "invalid indent")
+            return
+        minify = query.get("minify", ["0"])[0].lower() in ("1", "true", "yes")
+        try:
+            svg = self.server.render(location, content, indent=indent, minify=minify)
+        except ValueError as error:
+            self.send_text(400, str(error))
+            return
+        except Exception as error:
+            self.send_text(500, str(error) or type(error).__name__)
+            return
+        self.send_content(200, "image/svg+xml", svg)
+
+    def log_request(self, code="-", size="-"):
+        if not self.server.quiet:
+            super().log_request(code, size)
+
+    def send_text(self, code, text):
+        self.send_content(code, "text/plain", text + "\n")
+
+    def send_content(self, code, content_type, text):
+        data = text.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
@@ -0,0 +1,168 @@
+"""Columnar storage of records, such as the points of a chart.
+Much smaller than a list of record instances, which each have a dictionary
+of attributes, most of them None.
+"""
+
+import array
+import math
+
+import schema
+
+# The kind of each value of a numeric field.
+MISSING = 0
+INTEGER = 1
+FLOAT = 2
+
+# Key: type of value; value: its kind. Any other type is taken to be float.
+KINDS = {type(None): MISSING, int: INTEGER, float: FLOAT}
+
+
+class Table:
+    """Columnar storage of the records of a record class. The numeric fields,
+    those converted by 'float', are stored in arrays of doubles, which are
+    created when a value is first given, with NaN for missing values. The kind
+    of each value, missing, int or float, is kept in a byte array alongside,
+    so that a value NaN is not missing, and an int value is given back as such.
+    Other fields are stored sparsely, only for the records having a value.
+    Indexing or iterating gives record instances, created as needed; changes
+    to these are not stored in the table.
+    """
+
+    def __init__(self, record_class, records=None):
+        assert isinstance(record_class, type)
+
+        self.record_class = record_class
+        self.numeric = []
+        self.others = []
+        for name, functions in record_class.fields.items():
+            if functions and functions.get("convert") is float:
+                self.numeric.append(name)
+            else:
+                self.others.append(name)
+        self.count = 0
+        # Key: name of numeric field; value: array of values.
+        self.arrays = {}
+        # Key: name of numeric field; value: byte array of the kinds of values.
+        self.kinds = {}
+        # Key: name of other field; value: dictionary of values by record index.
+        self.sparse = {}
+        if records:
+            for record in records:
+                self.append(record)
+
+    def __repr__(self):
+        return f"Table({self.record_class.__name__}, {self.count} records)"
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("table index out of range")
+        values = {}
+        for name in self.numeric:
+            if (value := self.get_value(name, index)) is not None:
+                values[name] = value
+        for name, column in self.sparse.items():
+            if (value := column.get(index)) is not None:
+                values[name] = value
+        return schema.create(self.record_class, values, trusted=True)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    def append(self, record):
+        "Append the record, given as a dictionary or a record instance."
+        if isinstance(record, dict):
+            get = record.get
+        else:
+            assert isinstance(record, self.record_class)
+            get = record.__dict__.get
+        index = self.count
+        for name in self.numeric:
+            value = get(name)
+            column = self.arrays.get(name)
+            if value is None:
+                if column is not None:
+                    column.append(math.nan)
+                    self.kinds[name].append(MISSING)
+                continue
+            if column is None:
+                self.arrays[name] = column = array.array("d", [math.nan]) * index
+                self.kinds[name] = bytearray(index)
+            column.append(value)
+            self.kinds[name].append(KINDS.get(type(value), FLOAT))
+        for name in self.others:
+            if (value := get(name)) is not None:
+                self.sparse.setdefault(name, {})[index] = value
+        self.count += 1
+
+    def extend(self, columns):
+        """Append the records given by column: a dictionary of lists of values,
+        keyed by field name, with None for missing values. All lists must have
+        the same length, and a missing list means no values for that field.
+        """
+        count = len(next(iter(columns.values()), []))
+        offset = self.count
+        for name in self.numeric:
+            values = columns.get(name) or []
+            present = [value for value in values if value is not None]
+            column = self.arrays.get(name)
+            if not present:
+                if column is not None:
+                    column.extend(array.array("d", [math.nan]) * count)
+                    self.kinds[name].extend(bytes(count))
+                continue
+            if column is None:
+                self.arrays[name] = column = array.array("d", [math.nan]) * offset
+                self.kinds[name] = bytearray(offset)
+            if len(present) == count:
+                column.extend(values)
+            else:
+                column.extend(
+                    [math.nan if value is None else value for value in values]
+                )
+            self.kinds[name].extend([KINDS.get(type(value), FLOAT) for value in values])
+        for name in self.others:
+            values = columns.get(name) or []
+            entries = {
+                offset + index: value
+                for index, value in enumerate(values)
+                if value is not None
+            }
+            if entries:
+                self.sparse.setdefault(name, {}).update(entries)
+        self.count += count
+
+    def get_column(self, name):
+        "Return the array of values of the numeric field, with NaN for missing values."
+        assert name in self.numeric
+        try:
+            return self.arrays[name]
+        except KeyError:
+            return array.array("d", [math.nan]) * self.count
+
+    def get_entries(self, name):
+        """Return the values of the non-numeric field, keyed by record index,
+        for only the records having a value.
+        """
+        assert name in self.others
+        return self.sparse.get(name, {})
+
+    def get_value(self, name, index):
+        "Return the value of the field for the record at the index, or None."
+        if name in self.sparse:
+            return self.sparse[name].get(index)
+        try:
+            kind = self.kinds[name][index]
+        except KeyError:
+            return None
+        if kind == MISSING:
+            return None
+        value = self.arrays[name][index]
+        if kind == INTEGER:
+            return int(value)
+        return value
@@ -2,15 +2,45 @@
 
 from icecream import ic
 
+import asyncio
+import concurrent.futures
 import copy
+import functools
+import http.client
+import gzip
+import http.server
+import io
 import itertools
+import json
+import math
 import os
+import pathlib
 import random
+import re
+import shutil
 import sqlite3
 import string
+import tempfile
+import threading
+import time
 
+import yaml
+
+import batch
+import cache
 import constants
 import chart
+import datasource
+import minify
+import memo
+import minixml
+import schema
+import serve
+import style
+import table
+import utils
+import watch
+import web
 from lib import *
 
 random.seed(12345)
@@ -79,8 +109,8 @@ def check_roundtrip(instance1, filename):
         ic(instance1, instance2)
         raise ValueError("instances differ")
 
-    r1 = instance1.render(restart_unique_id=True)
-    r2 = instance2.render(restart_unique_id=True)
+    r1 = instance1.render()
+    r2 = instance2.render()
     if r1 != r2:
         with open("i1.svg", "w") as outfile:
             outfile.write(r1)
@@ -578,6 +608,780 @@ def test_points_marks():
     check_roundtrip(points_marks, "points_marks.yaml")
 
 
+def test_streaming():
+    "Streamed SVG output must be identical to the SVG string."
+    scatter = chart.retrieve("scatter_points.yaml")
+    content = scatter.render()
+    outfile = io.StringIO()
+    scatter.render(outfile)
+    if outfile.getvalue() != content:
+        raise ValueError("streamed rendering differs")
+    chunks = list(scatter.iter_svg(chunk_size=1000))
+    if len(chunks) < 2:
+        raise ValueError("SVG code not generated in chunks")
+    if "".join(chunks) != content:
+        raise ValueError("chunked rendering differs")
+
+
+def test_compress():
+    "Gzip-compressed SVG output must decompress to the SVG string."
+    scatter = chart.retrieve("scatter_points.yaml")
+    content = scatter.render()
+    compressed = scatter.render(compress=True)
+    if gzip.decompress(compressed).decode("utf-8") != content:
+        raise ValueError("compressed rendering differs")
+    outfile = io.BytesIO()
+    scatter.render(outfile, compress=True)
+    if gzip.decompress(outfile.getvalue()).decode("utf-8") != content:
+        raise ValueError("compressed rendering to file object differs")
+    with tempfile.TemporaryDirectory() as dirpath:
+        filepath = pathlib.Path(dirpath) / "scatter_points.svgz"
+        scatter.render(filepath)
+        if gzip.decompress(filepath.read_bytes()).decode("utf-8") != content:
+            raise ValueError("compressed rendering to .svgz file differs")
+
+
+def test_format_numbers():
+    "Batch formatting of numbers must be identical to 'N'."
+    values = [random.uniform(-1000, 1000) for i in range(10_000)]
+    values += [0, 1, -1, 0.0004999, 0.0005, -0.0005, 2.9999, 2.99995, 1e6 + 0.04]
+    values += [round(v) + random.choice([-1, 1]) * 0.0004 for v in values[:1000]]
+    if utils.format_numbers(values) != [utils.N(v) for v in values]:
+        raise ValueError("batch formatting differs from 'N'")
+    if utils.format_numbers([1.23456, 2.0001, 0.06], precision=1) != [
+        "1.2",
+        "2",
+        "0.1",
+    ]:
+        raise ValueError("batch formatting with precision 1 is incorrect")
+    if utils.format_numbers([100.001, 1234.5678, 2.0000001], precision=6) != [
+        "100.001",
+        "1234.5678",
+        "2",
+    ]:
+        raise ValueError("batch formatting with precision 6 is incorrect")
+
+
+def test_text_width():
+    "Cached text width from lookup tables must equal the sum of character widths."
+    for text in ["Billion years ago", "Ångström", "", "x" * 100]:
+        for font in ["sans-serif", "monospace"]:
+            for italic, bold, key in [
+                (False, False, "n"),
+                (True, False, "i"),
+                (False, True, "b"),
+                (True, True, "ib"),
+            ]:
+                widths = constants.CHARACTER_WIDTHS[font]
+                total = sum([widths.get(c, widths["default"])[key] for c in text])
+                width = utils.get_text_width(
+                    text, size=20, font=font, italic=italic, bold=bold
+                )
+                if width != 0.95 * total * 20 / 100:
+                    raise ValueError(f"invalid text width for {text!r}")
+    utils.get_text_width("Billion years ago")
+    hits = utils.get_text_width.cache_info().hits
+    utils.get_text_width("Billion years ago")
+    if utils.get_text_width.cache_info().hits != hits + 1:
+        raise ValueError("text width not cached")
+
+
+def test_validator_cache():
+    "The compiled validator must be reused for the same schema."
+    if schema.get_validator(Board.SCHEMA) is not schema.get_validator(Board.SCHEMA):
+        raise ValueError("validator not reused")
+    if schema.get_validator(Board.SCHEMA) is schema.get_validator(Note.SCHEMA):
+        raise ValueError("same validator for different schemas")
+
+
+def test_fast_items():
+    "Validation of large record arrays using compiled predicates, and trusted input."
+    points = [
+        dict(x=random.uniform(0, 100), y=random.uniform(0, 100), color="red")
+        for i in range(1000)
+    ]
+    data = dict(chart="scatter2d", points=points)
+    schema.validate(data, Scatter2d.SCHEMA)
+    points[500]["color"] = "bogus"
+    try:
+        schema.validate(data, Scatter2d.SCHEMA)
+    except ValueError as error:
+        if not str(error).endswith("in instance 'points'"):
+            raise ValueError(f"invalid error message: {error}")
+    else:
+        raise ValueError("invalid color not detected")
+    points[500]["color"] = "blue"
+    untrusted = Scatter2d(points=copy.deepcopy(points))
+    with schema.trusted():
+        trusted = Scatter2d(points=copy.deepcopy(points))
+    if trusted.as_dict() != untrusted.as_dict():
+        raise ValueError("trusted input gives different chart")
+    if schema.is_trusted():
+        raise ValueError("trusted mode not reset")
+
+
+def test_chart_cache():
+    "Chart specifications read from file must be cached, keyed by modification."
+    with tempfile.TemporaryDirectory() as dirpath:
+        filepath = pathlib.Path(dirpath) / "note.yaml"
+        Note(title="Cached", body="Body").save(filepath)
+        os.utime(filepath, (0, 0))  # Old enough to be cached.
+        misses = chart._chart_cache.misses
+        first = chart.retrieve(filepath)
+        second = chart.retrieve(filepath)
+        if chart._chart_cache.misses != misses + 1:
+            raise ValueError("chart specification not cached")
+        if first is second or first != second:
+            raise ValueError("cached chart is not a new, equal instance")
+        Note(title="Modified", body="Body").save(filepath)
+        os.utime(filepath, (1, 1))
+        if chart.retrieve(filepath).title.text != "Modified":
+            raise ValueError("modified chart specification not read")
+
+
+def test_web():
+    "Web resources fetched using conditional requests, cached in memory and on disk."
+
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        def log_request(self, code="-", size="-"):
+            statuses.append(int(code))
+
+    statuses = []
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(Handler, directory=os.getcwd())
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/pyramid.yaml"
+    try:
+        with tempfile.TemporaryDirectory() as dirpath:
+            web.set_cache_dir(dirpath)
+            web.clear()
+            text, validator = web.get(url)
+            if not validator or text != pathlib.Path("pyramid.yaml").read_text():
+                raise ValueError("invalid web resource")
+            if web.get(url)[0] != text:
+                raise ValueError("invalid web resource from memory cache")
+            web._responses.clear()  # Only the on-disk cache remains.
+            if web.get(url)[0] != text:
+                raise ValueError("invalid web resource from disk cache")
+            if statuses != [200, 304, 304]:
+                raise ValueError(f"invalid conditional requests: {statuses}")
+            if chart.retrieve(url) != chart.retrieve("pyramid.yaml"):
+                raise ValueError("invalid chart from web resource")
+    finally:
+        web.set_cache_dir(None)
+        web.clear()
+        server.shutdown()
+        server.server_close()
+
+
+def test_includes():
+    "Includes read concurrently must give the same chart; cycles must be detected."
+    if chart.retrieve("poster.yaml", workers=1) != chart.retrieve("poster.yaml"):
+        raise ValueError("concurrent includes give different chart")
+    with tempfile.TemporaryDirectory() as dirpath:
+        dirpath = pathlib.Path(dirpath)
+        for name, other in [("a", "b"), ("b", "c"), ("c", "a")]:
+            column = dict(chysl=constants.__version__, chart="column")
+            column["subcharts"] = [dict(include=str(dirpath / f"{other}.yaml"))]
+            with open(dirpath / f"{name}.yaml", "w") as outfile:
+                yaml.safe_dump(column, outfile)
+        try:
+            chart.retrieve(dirpath / "a.yaml")
+        except ValueError as error:
+            if "cycle of includes" not in str(error):
+                raise
+        else:
+            raise ValueError("cycle of includes not detected")
+
+
+def test_concurrent_retrieve():
+    "Concurrent reading of charts must not interfere with cycle detection."
+    expected = chart.retrieve("poster.yaml")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        charts = list(executor.map(chart.retrieve, ["poster.yaml"] * 16))
+    if any(c != expected for c in charts):
+        raise ValueError("concurrently read charts differ")
+
+    async def retrieve_all():
+        return await asyncio.gather(
+            *[asyncio.to_thread(chart.retrieve, "poster.yaml") for i in range(8)]
+        )
+
+    if any(c != expected for c in asyncio.run(retrieve_all())):
+        raise ValueError("charts read in asyncio tasks differ")
+    with memo.including("poster.yaml"):
+        # Another thread has its own stack of includes.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(chart.retrieve, "poster.yaml").result()
+        try:
+            chart.retrieve("poster.yaml")
+        except ValueError as error:
+            if "cycle of includes" not in str(error):
+                raise
+        else:
+            raise ValueError("cycle of includes not detected")
+    if memo.get_stack():
+        raise ValueError("stack of includes not empty")
+
+
+def test_render_context():
+    "Renderings, also concurrent ones, must have the same unique ids each time."
+    filenames = ["universe_earth.yaml", "day.yaml", "poster.yaml"]
+    expected = [chart.retrieve(filename).render() for filename in filenames]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(lambda f: chart.retrieve(f).render(), filenames * 8)
+        )
+    if results != expected * 8:
+        raise ValueError("concurrent renderings differ")
+    # The options after 'indent' are keyword-only.
+    try:
+        chart.retrieve("day.yaml").render(None, True, 2, True)
+    except TypeError:
+        pass
+    else:
+        raise ValueError("rendering option given by position accepted")
+    # Charts inlined in the same HTML page must not share any ids.
+    ids = []
+    for prefix in ["a-", "b-"]:
+        content = chart.retrieve("universe_earth.yaml").render(
+            styles=True, id_prefix=prefix
+        )
+        ids.append(set(re.findall(r' id="([^"]+)"', content)))
+        if not ids[-1] or not all(id.startswith(prefix) for id in ids[-1]):
+            raise ValueError("id prefix not used")
+        if f'class="{prefix}s' not in content:
+            raise ValueError("id prefix not used for hoisted classes")
+    if ids[0] & ids[1]:
+        raise ValueError("ids shared between inlined charts")
+
+
+def test_deep_tree():
+    "Serialization of a tree deeper than the recursion limit."
+    root = elem = minixml.Element("g")
+    for level in range(10_000):
+        elem = elem.create("g")
+    elem += "text"
+    lines = repr(root).split("\n")
+    if len(lines) != 2 * 10_000 + 2:
+        raise ValueError("invalid number of lines in deep tree")
+    if lines[10_001] != " " * 2 * 10_000 + "<g>text</g>":
+        raise ValueError("invalid indentation in deep tree")
+
+
+def test_symbols():
+    "Markers defined once as symbols, and referenced for each point."
+    scatter = Scatter2d(
+        points=[
+            dict(
+                x=random.uniform(0, 100),
+                y=random.uniform(0, 100),
+                color=random.choice(["red", "blue"]),
+            )
+            for i in range(1000)
+        ]
+    )
+    plain = scatter.render()
+    content = scatter.render(symbols=True)
+    if content.count("<symbol") != 2 or content.count("<use") != 1000:
+        raise ValueError("invalid symbols rendering")
+    if len(content) >= len(plain):
+        raise ValueError("symbols rendering not smaller")
+
+
+def test_styles():
+    "Repeated presentation attributes hoisted into CSS classes."
+    iris = chart.retrieve("scatter_iris.yaml")
+    plain = iris.render(indent=0)
+    content = iris.render(indent=0, styles=True)
+    if "<style>" not in content:
+        raise ValueError("no style element")
+    if len(plain) - len(content) != iris.hoisted_bytes:
+        raise ValueError("invalid number of hoisted bytes")
+    # Two charts inlined in one HTML page must not restyle each other.
+    rules = {}
+    for filename in ["scatter_iris.yaml", "markers.yaml", "pies_column.yaml"]:
+        content = chart.retrieve(filename).render(indent=0, styles=True)
+        for name, rule in re.findall(r"\.([\w-]+)\{([^}]*)\}", content):
+            if rules.setdefault(name, rule) != rule:
+                raise ValueError(f"class '{name}' clashes between inlined charts")
+    if len(rules) < 3:
+        raise ValueError("too few hoisted classes")
+    document = iris.get_document()
+    style.hoist(document, prefix="iris")
+    if ".iris1{" not in "".join(document.generate(indent=0)):
+        raise ValueError("class name prefix not used")
+
+
+def test_minify():
+    "Minified SVG code."
+    pyramid = chart.retrieve("pyramid.yaml")
+    plain = pyramid.render(indent=0)
+    content = pyramid.render(minify=True)
+    if content.startswith("<?xml") or " />" in content or "\n" in content:
+        raise ValueError("SVG code not minified")
+    if len(content) >= len(plain):
+        raise ValueError("minified SVG code not smaller")
+    if minify.minify_path("M 0 0 L 10 0 L 10.5 10 Z") != "M0 0H10l.5 10z":
+        raise ValueError("path data not minified")
+
+
+def test_json_spec():
+    "Chart specification in JSON must give the same chart as in YAML."
+    pyramid = chart.retrieve("pyramid.yaml")
+    data = {"chysl": {"version": constants.__version__}}
+    data.update(pyramid.as_dict())
+    with tempfile.TemporaryDirectory() as dirpath:
+        filepath = os.path.join(dirpath, "pyramid.json")
+        with open(filepath, "w") as outfile:
+            json.dump(data, outfile)
+        if chart.retrieve(filepath) != pyramid:
+            raise ValueError("JSON specification gives different chart")
+        with open(filepath, "w") as outfile:
+            outfile.write("[1, 2]")
+        try:
+            chart.retrieve(filepath)
+        except ValueError as error:
+            if "JSON" not in str(error):
+                raise ValueError(f"invalid error: {error}")
+        else:
+            raise ValueError("non-object JSON accepted")
+    if yaml.__with_libyaml__ and utils.YamlLoader is not yaml.CSafeLoader:
+        raise ValueError("LibYAML loader not used")
+
+
+def test_batch():
+    "Batch conversion in worker processes must give the same SVG; report failures."
+    with tempfile.TemporaryDirectory() as dirpath:
+        infilepaths = batch.find_files(["pyramid.yaml", "pies_*.yaml", "missing.yaml"])
+        if infilepaths != [
+            "missing.yaml",
+            "pies_column.yaml",
+            "pies_row.yaml",
+            "pyramid.yaml",
+        ]:
+            raise ValueError(f"invalid files found: {infilepaths}")
+        results = list(batch.run(infilepaths, outdirpath=dirpath, workers=2))
+        if len(results) != len(infilepaths):
+            raise ValueError("missing batch results")
+        for result in results:
+            if result.infilepath == "missing.yaml":
+                if not result.error:
+                    raise ValueError("missing file not reported")
+                continue
+            if result.error:
+                raise ValueError(f"batch conversion failed: {result.error}")
+            expected = pathlib.Path(result.infilepath).with_suffix(".svg")
+            if pathlib.Path(result.outfilepath).read_text() != expected.read_text():
+                raise ValueError(f"batch output differs for {result.infilepath}")
+
+    # Files with the same name in different directories are written to the
+    # same relative paths in the output directory; other collisions fail.
+    with tempfile.TemporaryDirectory() as dirpath:
+        infilepaths = []
+        for name in ["a", "b"]:
+            pathlib.Path(dirpath, name).mkdir()
+            infilepaths.append(os.path.join(dirpath, name, "pyramid.yaml"))
+            shutil.copyfile("pyramid.yaml", infilepaths[-1])
+        outdirpath = os.path.join(dirpath, "out")
+        results = list(batch.run(infilepaths, outdirpath=outdirpath, workers=2))
+        outfilepaths = sorted(result.outfilepath for result in results)
+        if outfilepaths != [
+            os.path.join(outdirpath, "a", "pyramid.svg"),
+            os.path.join(outdirpath, "b", "pyramid.svg"),
+        ]:
+            raise ValueError(f"invalid output files: {outfilepaths}")
+        if any(result.error for result in results):
+            raise ValueError("batch conversion into subdirectories failed")
+        infilepath = os.path.join(dirpath, "a", "pyramid.yml")
+        shutil.copyfile("pyramid.yaml", infilepath)
+        try:
+            list(batch.run([infilepaths[0], infilepath], outdirpath=outdirpath))
+        except ValueError:
+            pass
+        else:
+            raise ValueError("colliding output files not detected")
+
+
+def test_watch():
+    "Only the charts depending on a changed file must be re-rendered."
+    origdir = os.getcwd()
+    with tempfile.TemporaryDirectory() as dirpath:
+        for filename in ["day.yaml", "day.csv", "pyramid.yaml"]:
+            pathlib.Path(dirpath, filename).write_bytes(
+                pathlib.Path(filename).read_bytes()
+            )
+        os.chdir(dirpath)
+        try:
+            with open("column.yaml", "w") as outfile:
+                yaml.safe_dump(
+                    dict(
+                        chysl=constants.__version__,
+                        chart="column",
+                        subcharts=[dict(include="pyramid.yaml")],
+                    ),
+                    outfile,
+                )
+            watcher = watch.Watcher(["column.yaml", "day.yaml", "pyramid.yaml"])
+            if any(result.error for result in watcher.render_all()):
+                raise ValueError("watched charts not rendered")
+            if watcher.poll():
+                raise ValueError("charts re-rendered without changes")
+            if watcher.get_dependents("pyramid.yaml") != [
+                "column.yaml",
+                "pyramid.yaml",
+            ]:
+                raise ValueError("invalid dependents of included chart")
+            for filename, expected in [
+                ("day.csv", ["day.yaml"]),
+                ("pyramid.yaml", ["column.yaml", "pyramid.yaml"]),
+            ]:
+                stat = os.stat(filename)
+                os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+                results = watcher.poll()
+                if [result.infilepath for result in results] != expected:
+                    raise ValueError(f"invalid charts re-rendered for {filename}")
+                if any(result.error for result in results):
+                    raise ValueError("re-rendered chart failed")
+
+            # A change saved while the chart is rendered must be seen by the poll.
+            def convert(*args, **kwargs):
+                result = original(*args, **kwargs)
+                stat = os.stat("day.csv")
+                os.utime("day.csv", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+                return result
+
+            watcher = watch.Watcher(["day.yaml"])
+            original = batch.convert
+            batch.convert = convert
+            try:
+                watcher.render_all()
+            finally:
+                batch.convert = original
+            if [result.infilepath for result in watcher.poll()] != ["day.yaml"]:
+                raise ValueError("change while rendering not seen")
+        finally:
+            os.chdir(origdir)
+
+
+def test_watch_wal():
+    "A change to a database in WAL mode must re-render the charts reading it."
+    origdir = os.getcwd()
+    with tempfile.TemporaryDirectory() as dirpath:
+        os.chdir(dirpath)
+        cnx = sqlite3.connect("points.db")
+        try:
+            cnx.execute("PRAGMA journal_mode=WAL")
+            cnx.execute("CREATE TABLE points(x REAL, y REAL)")
+            cnx.executemany("INSERT INTO points VALUES(?, ?)", [(0, 0), (1, 2)])
+            cnx.commit()
+            scatter = Scatter2d(
+                points=dict(
+                    database="sqlite",
+                    source="points.db",
+                    select="SELECT x, y FROM points",
+                )
+            )
+            scatter.save("scatter.yaml")
+            watcher = watch.Watcher(["scatter.yaml"])
+            if any(result.error for result in watcher.render_all()):
+                raise ValueError("watched chart not rendered")
+            if (
+                watch.normalize("points.db-wal")
+                not in watcher.dependencies["scatter.yaml"]
+            ):
+                raise ValueError("WAL file not recorded as a dependency")
+            # The connection is kept open, so the change is only in the WAL file.
+            size = os.path.getsize("points.db")
+            cnx.execute("INSERT INTO points VALUES(?, ?)", (3, 1))
+            cnx.commit()
+            if os.path.getsize("points.db") != size:
+                raise ValueError("database file changed; WAL mode not in effect")
+            results = watcher.poll()
+            if [result.infilepath for result in results] != ["scatter.yaml"]:
+                raise ValueError("chart not re-rendered for change in WAL file")
+            if any(result.error for result in results):
+                raise ValueError("re-rendered chart failed")
+        finally:
+            cnx.close()
+            os.chdir(origdir)
+
+
+def test_serve():
+    "Charts rendered by the service; files outside the root directory refused."
+    server = serve.Server(
+        ("127.0.0.1", 0), rootdirpath=os.getcwd(), workers=2, quiet=True
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def request(method, path, body=None, headers={}):
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port)
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            return response.status, response.read().decode("utf-8")
+        finally:
+            connection.close()
+
+    try:
+        expected = chart.retrieve("pyramid.yaml").render()
+        if request("GET", "/pyramid.yaml") != (200, expected):
+            raise ValueError("invalid chart from GET")
+        content = pathlib.Path("pyramid.yaml").read_text()
+        if request("POST", "/", body=content) != (200, expected):
+            raise ValueError("invalid chart from POST of YAML")
+        data = utils.load_yaml(content)
+        status, text = request(
+            "POST",
+            "/?minify=1",
+            body=json.dumps(data),
+            headers={"Content-Type": "application/json"},
+        )
+        if status != 200 or text != chart.retrieve("pyramid.yaml").render(minify=True):
+            raise ValueError("invalid chart from POST of JSON")
+        if request("GET", "/../chysl/tests.py")[0] != 403:
+            raise ValueError("file outside root directory not refused")
+        if request("GET", "/missing.yaml")[0] != 404:
+            raise ValueError("missing file not reported")
+        data = dict(chysl=constants.__version__, chart="column")
+        data["subcharts"] = [dict(include="../chysl/pyramid.yaml")]
+        status, text = request("POST", "/", body=yaml.safe_dump(data))
+        if status != 400 or "access denied" not in text:
+            raise ValueError("include outside root directory not refused")
+        url = f"http://127.0.0.1:{server.server_port}/pyramid.yaml"
+        data["subcharts"] = [dict(include=url)]
+        status, text = request("POST", "/", body=yaml.safe_dump(data))
+        if status != 400 or "access denied" not in text:
+            raise ValueError("web resource not refused")
+        hits = datasource._records.hits
+        for i in range(2):
+            if request("GET", "/day.yaml")[0] != 200:
+                raise ValueError("chart with datasource not rendered")
+        if datasource._records.hits <= hits:
+            raise ValueError("datasource records not cached")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    server = serve.Server(
+        ("127.0.0.1", 0),
+        quiet=True,
+        allowed_urls=["https://example.com/data/"],
+    )
+    try:
+        server.check("https://example.com/data/points.csv")
+        for url in [
+            "https://example.com/secret.csv",
+            "http://example.com/data/points.csv",
+            "https://example.com.evil.org/data/points.csv",
+            "ftp://example.com/data/points.csv",
+        ]:
+            try:
+                server.check(url)
+            except ValueError:
+                pass
+            else:
+                raise ValueError(f"web resource not allowed was accepted: {url}")
+    finally:
+        server.server_close()
+
+
+def test_render_cache():
+    "SVG code cached by chart and datasource fingerprints, in memory and on disk."
+    origdir = os.getcwd()
+    with tempfile.TemporaryDirectory() as dirpath:
+        for filename in ["day.yaml", "day.csv"]:
+            pathlib.Path(dirpath, filename).write_bytes(
+                pathlib.Path(filename).read_bytes()
+            )
+        os.chdir(dirpath)
+        try:
+            with open("column.yaml", "w") as outfile:
+                yaml.safe_dump(
+                    dict(
+                        chysl=constants.__version__,
+                        chart="column",
+                        subcharts=[dict(include="day.yaml")],
+                    ),
+                    outfile,
+                )
+            for filename in ["day.yaml", "day.csv", "column.yaml"]:
+                os.utime(filename, (0, 0))  # Old enough to be cached.
+            column = chart.retrieve("column.yaml")
+            subcharts = column.get_subcharts()
+            if len(subcharts) != 1 or len(subcharts[0].get_datasources()) != 1:
+                raise ValueError("invalid subcharts or datasources")
+            if column.get_cache_key() is None:
+                raise ValueError("no cache key for chart with file datasource")
+            expected = column.render()
+            for rendercache in [cache.LRUCache(8), cache.DiskCache("svg", maxsize=2)]:
+                os.utime("day.csv", (0, 0))
+                if chart.retrieve("column.yaml").render(cache=rendercache) != expected:
+                    raise ValueError("invalid SVG code when not cached")
+                hits = rendercache.hits
+                if chart.retrieve("column.yaml").render(cache=rendercache) != expected:
+                    raise ValueError("invalid SVG code from cache")
+                if rendercache.hits != hits + 1:
+                    raise ValueError("SVG code not taken from cache")
+                os.utime("day.csv", (1, 1))  # Datasource modified.
+                if chart.retrieve("column.yaml").render(cache=rendercache) != expected:
+                    raise ValueError("invalid SVG code for modified datasource")
+                if rendercache.hits != hits + 1:
+                    raise ValueError("SVG code for modified datasource from cache")
+            diskcache = cache.DiskCache("lru", maxsize=2)
+            for key in ["a", "b", "a", "c"]:
+                if diskcache.get(key) is None:
+                    diskcache.set(key, key)
+                time.sleep(0.01)
+            if len(diskcache) != 2 or "b" in diskcache or "a" not in diskcache:
+                raise ValueError("least recently used entry not evicted from disk")
+        finally:
+            os.chdir(origdir)
+
+
+def test_csv_stream():
+    "CSV and TSV datasources read in a single pass from file or web resource."
+    from piechart import Slice
+
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        def log_request(self, code="-", size="-"):
+            pass
+
+    expected = [
+        dict(value=8.0, label="Sleep, long", color="gray"),
+        dict(value=2.0, label=None, color="red"),
+    ]
+    with tempfile.TemporaryDirectory() as dirpath:
+        tsvpath = os.path.join(dirpath, "day.tsv")
+        with open(tsvpath, "w") as outfile:
+            outfile.write("hours\tlabel\tcolor\n8\tSleep, long\tgray\n\n2\t\tred\n")
+        csvpath = os.path.join(dirpath, "day.csv")
+        with open(csvpath, "w") as outfile:
+            outfile.write('8,"Sleep, long",gray\n2,,red\n')
+        server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), functools.partial(Handler, directory=dirpath)
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/day.tsv"
+        try:
+            for spec in [
+                dict(source=tsvpath, map=dict(value="hours")),
+                dict(source=url, map=dict(value="hours")),
+                dict(source=csvpath, map=dict(value=1, label=2, color=3)),
+            ]:
+                source = datasource.Datasource(spec, Slice)
+                records = [
+                    dict(value=r.value, label=r.label, color=r.color)
+                    for r in source.data
+                ]
+                if records != expected:
+                    raise ValueError(f"invalid records from {spec['source']}")
+
+            # The rows are cached only if the size of the data is small enough.
+            os.utime(csvpath, (0, 0))  # Old enough to be cached.
+            maxsize = constants.DATASOURCE_CACHE_BYTES
+            try:
+                for filepath, spec in [
+                    (csvpath, dict(source=csvpath, map=dict(value=1))),
+                    (tsvpath, dict(source=url, map=dict(value="hours"))),
+                ]:
+                    size = os.path.getsize(filepath)
+                    for limit, cached in [(size, True), (size - 1, False)]:
+                        constants.DATASOURCE_CACHE_BYTES = limit
+                        datasource._records.clear()
+                        source = datasource.Datasource(spec, Slice)
+                        if (source.fingerprint in datasource._records) != cached:
+                            raise ValueError(f"invalid caching of {spec['source']}")
+            finally:
+                constants.DATASOURCE_CACHE_BYTES = maxsize
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def test_table():
+    "Points stored in columns must give back the same records."
+    from scatter2d import Point2d
+
+    points = [
+        dict(x=1, y=2.5),
+        dict(x=3, y=-1.0, color="red", label="Three", size=12),
+        dict(x=5, y=0.25, opacity=0.5, href="https://example.com/"),
+    ]
+    data = table.Table(Point2d, points)
+    if len(data) != 3 or [p.as_dict() for p in data] != points:
+        raise ValueError("invalid records from table")
+    if data[-1].as_dict() != points[-1] or not isinstance(data[0].x, int):
+        raise ValueError("invalid record from table by index")
+    if list(data.get_column("x")) != [1.0, 3.0, 5.0]:
+        raise ValueError("invalid column from table")
+    if data.get_entries("label") != {1: "Three"} or data.get_value("size", 0):
+        raise ValueError("invalid sparse column from table")
+    if len(data.get_column("opacity")) != 3 or "marker" in data.sparse:
+        raise ValueError("invalid missing values in table")
+    scatter = Scatter2d(points=points)
+    if scatter.as_dict()["points"] != points:
+        raise ValueError("invalid points from scatter chart")
+    # Ints and floats mixed in a column, and NaN distinct from a missing value.
+    mixed = [dict(x=1, y=2), dict(x=2.5, y=math.nan), dict(x=3, y=0.5, size=4)]
+    data = table.Table(Point2d, mixed)
+    data.extend(dict(x=[4, 5.5], y=[1.0, 2], size=[None, 6.5]))
+    mixed += [dict(x=4, y=1.0), dict(x=5.5, y=2, size=6.5)]
+
+    def get_reprs(records):
+        "Compare values by their repr, so that 1 differs from 1.0, and NaN equals NaN."
+        return [{key: repr(value) for key, value in r.items()} for r in records]
+
+    if get_reprs([p.as_dict() for p in data]) != get_reprs(mixed):
+        raise ValueError("invalid mixed int and float values from table")
+    scatter = Scatter2d(points=mixed[:1] + mixed[2:])
+    with tempfile.TemporaryDirectory() as dirpath:
+        filepath = os.path.join(dirpath, "mixed.yaml")
+        scatter.save(filepath)
+        if chart.retrieve(filepath).as_dict() != scatter.as_dict():
+            raise ValueError("invalid roundtrip of mixed int and float values")
+        if "x: 1.0" in pathlib.Path(filepath).read_text():
+            raise ValueError("int value saved as float")
+
+
+def test_bulk_records():
+    "Records converted and checked by column; the first bad record is reported."
+    from scatter2d import Point2d
+
+    chunk_size = constants.DATASOURCE_CHUNK_SIZE
+    good = ["1,2,10,0.5,red"] * 3
+    with tempfile.TemporaryDirectory() as dirpath:
+        filepath = os.path.join(dirpath, "points.csv")
+        for rows, expected in [
+            (good, None),
+            (good + ["1,2,,1.5,red", "abc,2,,,"], "record # 3: invalid value '1.5'"),
+            (good + ["1,2,,,notacolor"], "record # 3: invalid value 'notacolor'"),
+            (["1,,,,"] + good, "record # 0: missing value for 'y'"),
+            (good + ["1,2,nan,,"], "record # 3: invalid value 'nan'"),
+            (good + ["1,2,-1,,"] + good, "record # 3: invalid value '-1'"),
+            (
+                good * chunk_size + ["abc,2,,,"],
+                f"record # {3 * chunk_size}: could not convert string to float: 'abc'",
+            ),
+        ]:
+            with open(filepath, "w") as outfile:
+                outfile.write("x,y,size,opacity,color\n")
+                outfile.write("\n".join(rows))
+            try:
+                source = datasource.Datasource(dict(source=filepath), Point2d)
+            except ValueError as error:
+                if str(error) != expected:
+                    raise ValueError(f"invalid error: {error}")
+            else:
+                if expected:
+                    raise ValueError(f"no error for: {expected}")
+                if [p.as_dict() for p in source.data] != [
+                    dict(x=1.0, y=2.0, size=10.0, opacity=0.5, color="red")
+                ] * len(rows):
+                    raise ValueError("invalid records")
+
+
 def run_tests():
     origdir = os.getcwd()
     try:
@@ -599,6 +1403,30 @@ def run_tests():
         test_poster()
         test_dimensions()
         test_points_marks()
+        test_streaming()
+        test_compress()
+        test_format_numbers()
+        test_text_width()
+        test_validator_cache()
+        test_fast_items()
+        test_chart_cache()
+        test_web()
+        test_includes()
+        test_concurrent_retrieve()
+        test_render_context()
+        test_deep_tree()
+        test_symbols()
+        test_styles()
+        test_minify()
+        test_json_spec()
+        test_batch()
+        test_watch()
+        test_watch_wal()
+        test_serve()
+        test_render_cache()
+        test_csv_stream()
+        test_table()
+        test_bulk_records()
     finally:
         os.chdir(origdir)
 
@@ -11,7 +11,7 @@ import utils
 from color import Color
 from chart import Chart, Layout, register
 from dimension import Xdimension, Axis, Grid
-from marker import Marker
+from marker import Marker, Symbols
 from minixml import Element
 from path import Path
 from utils import N
@@ -224,9 +224,9 @@ class Timelines(Chart):
         result.update(self.grid.as_dict())
         return result
 
-    def build(self):
+    def build(self, context):
         "Create the SVG elements in the 'svg' attribute."
-        super().build()
+        super().build(context)
 
         # Determine the y position for each timeline; sets height of the chart area.
         timelines = dict()  # Key: timeline; value: y (pixels)
@@ -245,7 +245,7 @@ class Timelines(Chart):
         layout = Layout(rows=2, columns=2, title=self.title)
         layout.add(0, 0, self.get_legend(timelines))
         layout.add(0, 1, self.frame.get_element(self.width, self.height))
-        layout.add(0, 1, self.get_plot(dimension, timelines))
+        layout.add(0, 1, self.get_plot(dimension, timelines, context))
         layout.add(1, 1, dimension.get_labels(self.width))
         self.svg.load_layout(layout)
 
@@ -277,11 +277,14 @@ class Timelines(Chart):
         result["transform"] = f"translate({N(result.total_width - padding)}, 0)"
         return result
 
-    def get_plot(self, dimension, timelines):
-        "Get the element for the chart plot area, grid and entries."
+    def get_plot(self, dimension, timelines, context):
+        """Get the element for the chart plot area, grid and entries.
+        If 'symbols' is set in the context, define markers once as symbols
+        and reference them.
+        """
         result = Element("g")
         result["class"] = "plot"
-        clippath_id = next(utils.unique_id)
+        clippath_id = context.new_id()
         result["clip-path"] = f"url(#{clippath_id})"
         result.total_width = self.width
         result.total_height = self.height
@@ -300,9 +303,30 @@ class Timelines(Chart):
         if self.grid:
             result += dimension.get_grid(self.height, self.grid)
 
+        # Symbol definitions for markers, if used.
+        if context.symbols:
+            registry = Symbols(context)
+            result += registry.defs
+        else:
+            registry = None
+
+        # Marker coordinates of all events, formatted at once.
+        events = [entry for entry in self.entries if isinstance(entry, Event)]
+        xs = utils.format_numbers([event.get_x(dimension) for event in events])
+        ys = utils.format_numbers(
+            [timelines[event.timeline] + self.DEFAULT_SIZE / 2 for event in events]
+        )
+        formatted = {id(event): (x, y) for event, x, y in zip(events, xs, ys)}
+
         # Graphics for entries (periods and events).
         for entry in self.entries:
-            result += entry.render_graphic(timelines[entry.timeline], dimension)
+            result += entry.render_graphic(
+                timelines[entry.timeline],
+                dimension,
+                context,
+                symbols=registry,
+                formatted=formatted.get(id(entry)),
+            )
 
         # Labels for entries (periods and events). After graphics, to render on top.
         result += (labels := Element("g"))
@@ -345,7 +369,10 @@ class _Entry:
     def minmax(self):
         raise NotImplementedError
 
-    def render_graphic(self, y, dimension):
+    def render_graphic(self, y, dimension, context, symbols=None, formatted=None):
+        """Get the graphic for the entry. If given, 'formatted' is the pair
+        of already formatted marker coordinates.
+        """
         raise NotImplementedError
 
     def render_label(self, y, dimension):
@@ -433,14 +460,23 @@ class Event(_Entry):
         else:
             return self.instant
 
-    def render_graphic(self, y, dimension):
+    def get_x(self, dimension):
+        "Get the pixel x coordinate of the marker."
         if isinstance(self.instant, dict):
-            x = dimension.get_pixel(self.instant["value"])
+            return dimension.get_pixel(self.instant["value"])
         else:
-            x = dimension.get_pixel(self.instant)
+            return dimension.get_pixel(self.instant)
 
+    def render_graphic(self, y, dimension, context, symbols=None, formatted=None):
+        x = self.get_x(dimension)
+        fx, fy = formatted or (None, None)
         marker = Marker(self.marker, color=self.color, href=self.href)
-        result = marker.get_graphic(x, y + Timelines.DEFAULT_SIZE / 2)
+        if symbols:
+            result = symbols.get_graphic(
+                marker, x, y + Timelines.DEFAULT_SIZE / 2, fx=fx, fy=fy
+            )
+        else:
+            result = marker.get_graphic(x, y + Timelines.DEFAULT_SIZE / 2, fx=fx, fy=fy)
         result["class"] = "event"
         self.label_x_offset = marker.label_x_offset
 
@@ -564,7 +600,7 @@ class Period(_Entry):
             high = self.end
         return (low, high)
 
-    def render_graphic(self, y, dimension):
+    def render_graphic(self, y, dimension, context, symbols=None, formatted=None):
         # Simple case: do not show fuzzy values, or no fuzzy values.
         if (
             self.fuzzy == constants.NONE
@@ -680,7 +716,7 @@ class Period(_Entry):
                     if x1 < x2:
                         result += (defs := Element("defs"))
                         # The gradient-filled rectangle.
-                        id1 = next(utils.unique_id)
+                        id1 = context.new_id()
                         defs += (fill1 := Element("linearGradient", id=id1))
                         fill1 += (stop := Element("stop", offset=0))
                         stop["stop-color"] = self.color or "white"
@@ -698,7 +734,7 @@ class Period(_Entry):
                             stroke="none",
                         )
                         # Horizontal lines of the gradient-filled rectangle.
-                        id2 = next(utils.unique_id)
+                        id2 = context.new_id()
                         defs += (stroke1 := Element("linearGradient", id=id2))
                         stroke1 += (stop := Element("stop", offset=0))
                         stop["stop-color"] = Timelines.DEFAULT_COLOR
@@ -725,7 +761,7 @@ class Period(_Entry):
                     # The right gradient of the period.
                     if x3 < x4:
                         result += (defs := Element("defs"))
-                        id3 = next(utils.unique_id)
+                        id3 = context.new_id()
                         defs += (fill2 := Element("linearGradient", id=id3))
                         fill2 += (stop := Element("stop", offset=0))
                         stop["stop-color"] = self.color or "white"
@@ -744,7 +780,7 @@ class Period(_Entry):
                             stroke="none",
                         )
                         # Horizontal lines of the gradient-filled rectangle.
-                        id4 = next(utils.unique_id)
+                        id4 = context.new_id()
                         defs += (stroke2 := Element("linearGradient", id=id4))
                         stroke2 += (stop := Element("stop", offset=0))
                         stop["stop-color"] = Timelines.DEFAULT_COLOR
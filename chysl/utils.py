@@ -1,37 +1,74 @@
 "Various utility functions."
 
+import functools
 import itertools
 import math
 
 import webcolors
+import yaml
 
 import constants
 from minixml import Element
 
+# Use the LibYAML-based loader and dumper if available, since they are faster.
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
 
-def get_unique_id():
-    count = itertools.count(1)
-    while True:
-        yield f"id{next(count)}"
 
+def load_yaml(content):
+    "Parse the YAML content, which is a string or an open file object."
+    return yaml.load(content, Loader=YamlLoader)
 
-unique_id = get_unique_id()
 
-
-def restart_unique_id():
-    global unique_id
-    unique_id = get_unique_id()
+def dump_yaml(data, outfile=None):
+    """Output the data as YAML into the open file object, if given,
+    else return the YAML string.
+    """
+    return yaml.dump(
+        data, outfile, Dumper=YamlDumper, allow_unicode=True, sort_keys=False
+    )
 
 
-def N(x):
-    "Return a minimal string representation of the numerical value."
-    assert isinstance(x, (int, float))
-    if math.isclose(
-        x, (rounded := round(x)), rel_tol=constants.REL_TOL, abs_tol=constants.ABS_TOL
-    ):
-        return f"{rounded:d}"
+@functools.cache
+def get_formatter(precision=3):
+    """Return the function giving a minimal string representation of a numerical
+    value, with at most the given number of decimals. A value is represented
+    as an integer if it is within half of the last decimal of it, or within
+    a tenth of that relative to its magnitude.
+    """
+    assert isinstance(precision, int) and precision >= 0
+    if precision == 3:
+        rel_tol, abs_tol = constants.REL_TOL, constants.ABS_TOL
     else:
-        return f"{x:.3f}".rstrip("0").rstrip(".")
+        abs_tol = 5 / 10 ** (precision + 1)
+        rel_tol = abs_tol / 10
+    isclose = math.isclose
+    format = f"%.{precision}f"
+
+    def formatter(x):
+        assert isinstance(x, (int, float))
+        if isclose(x, (rounded := round(x)), rel_tol=rel_tol, abs_tol=abs_tol):
+            return f"{rounded:d}"
+        else:
+            return (format % x).rstrip("0").rstrip(".")
+
+    return formatter
+
+
+# Return a minimal string representation of the numerical value, 3 decimals at most.
+N = get_formatter(3)
+
+
+def format_numbers(values, precision=3):
+    """Return a list of minimal string representations of the numerical values,
+    using the formatter for the given precision; for precision 3, that is 'N'.
+    Any sequence of numbers is accepted, including a NumPy array.
+    """
+    if hasattr(values, "tolist"):  # NumPy array: convert all values in one go.
+        values = values.tolist()
+    return list(map(get_formatter(precision), values))
 
 
 def is_color(value):
@@ -55,6 +92,18 @@ def is_marker(value):
     return value in constants.MARKERS or len(value) == 1
 
 
+# Character widths, as lookup table and default width, for each font and style.
+CHARACTER_WIDTHS = {
+    (font, key): (
+        {c: widths[key] for c, widths in characters.items() if c != "default"},
+        characters["default"][key],
+    )
+    for font, characters in constants.CHARACTER_WIDTHS.items()
+    for key in ("n", "i", "b", "ib")
+}
+
+
+@functools.lru_cache(maxsize=4096)
 def get_text_width(
     text,
     size=constants.DEFAULT_FONT_SIZE,
@@ -64,9 +113,9 @@ def get_text_width(
 ):
     """Compute the width of the string given the size in points (pt).
     Uses empirically based measurements.
+    The result is cached, since the same texts are measured repeatedly.
     """
     assert font in ("sans-serif", "serif", "monospace")
-    widths = constants.CHARACTER_WIDTHS[font]
     if italic:
         if bold:
             key = "ib"
@@ -77,7 +126,8 @@ def get_text_width(
     else:
         key = "n"
     if text:
-        total = sum([widths.get(c, widths["default"])[key] for c in text])
+        widths, default = CHARACTER_WIDTHS[(font, key)]
+        total = sum(map(widths.get, text, itertools.repeat(default)))
     else:
         total = 0
     # Empirical factor 0.95
@@ -90,11 +140,3 @@ def sum_width(*items):
 
 def sum_height(*items):
     return sum([i.height for i in items if i is not None])
-
-
-if __name__ == "__main__":
-    print(next(unique_id))
-    print(next(unique_id))
-    print(next(unique_id))
-    restart_unique_id()
-    print(next(unique_id))
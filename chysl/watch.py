@@ -0,0 +1,132 @@
+"""Watching chart files and their dependencies, re-rendering on changes.
+The included charts and the datasources read by each chart are recorded
+when it is rendered, so that a change re-renders only the charts depending on it.
+"""
+
+import os
+import time
+import urllib.parse
+
+import batch
+import memo
+
+
+class Watcher:
+    """Re-render chart files to SVG when any file they depend on changes.
+    Raises ValueError if two chart files would be written to the same SVG file.
+    """
+
+    def __init__(
+        self, infilepaths, outdirpath=None, indent=2, minify=False, compress=False
+    ):
+        self.infilepaths = list(infilepaths)
+        # Key: chart file path; value: SVG file path.
+        self.outfilepaths = dict(
+            zip(
+                self.infilepaths,
+                batch.get_outfilepaths(self.infilepaths, outdirpath, compress),
+            )
+        )
+        self.indent = indent
+        self.minify = minify
+        self.compress = compress
+        # Key: chart file path; value: set of normalized paths it depends on.
+        self.dependencies = {}
+        # Key: normalized path; value: signature of the file when last seen.
+        self.signatures = {}
+
+    def render(self, infilepath):
+        """Render the chart file, recording the files it depends on.
+        The signature of each file is taken before it is read, so that
+        a change saved while the chart is rendered is seen by the next poll.
+        Return the Result.
+        """
+        signatures = {normalize(infilepath): get_signature(infilepath)}
+
+        def snapshot(location):
+            "Record the signature of the file at the location, before it is read."
+            if (path := get_path(location)) and path not in signatures:
+                signatures[path] = get_signature(path)
+
+        with memo.recording(check=snapshot):
+            result = batch.convert(
+                infilepath,
+                self.outfilepaths[infilepath],
+                indent=self.indent,
+                minify=self.minify,
+                compress=self.compress,
+            )
+        self.dependencies[infilepath] = set(signatures)
+        for path, signature in signatures.items():
+            self.signatures.setdefault(path, signature)
+        return result
+
+    def render_all(self):
+        "Render all chart files. Return the list of Results."
+        return [self.render(infilepath) for infilepath in self.infilepaths]
+
+    def get_dependents(self, path):
+        "Return the chart files depending on the file, directly or via includes."
+        path = normalize(path)
+        return [
+            infilepath
+            for infilepath in self.infilepaths
+            if path in self.dependencies.get(infilepath, ())
+        ]
+
+    def poll(self):
+        """Check the files for changes, and re-render the charts depending on
+        the changed files. Return the list of Results.
+        """
+        changed = set()
+        for path, signature in list(self.signatures.items()):
+            current = get_signature(path)
+            if current != signature:
+                self.signatures[path] = current
+                changed.add(path)
+        if not changed:
+            return []
+        result = []
+        for infilepath in self.infilepaths:
+            if changed.intersection(self.dependencies.get(infilepath, ())):
+                result.append(self.render(infilepath))
+        # Forget the files no longer depended on by any chart.
+        used = set().union(*self.dependencies.values())
+        for path in list(self.signatures):
+            if path not in used:
+                del self.signatures[path]
+        return result
+
+    def run(self, interval=1.0):
+        """Render all chart files, and then poll for changes every 'interval'
+        seconds. Yield each Result. Never returns.
+        """
+        assert isinstance(interval, (int, float)) and interval > 0
+        yield from self.render_all()
+        while True:
+            time.sleep(interval)
+            yield from self.poll()
+
+
+def normalize(path):
+    "Return the normalized absolute path."
+    return os.path.normcase(os.path.abspath(path))
+
+
+def get_path(location):
+    "Return the normalized path of the file at the location, or None if not a file."
+    parts = urllib.parse.urlparse(location)
+    if not parts.scheme:
+        return normalize(location)
+    elif parts.scheme == "file":
+        return normalize(parts.path)
+    return None
+
+
+def get_signature(path):
+    "Return the modification time and size of the file, or None if it does not exist."
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
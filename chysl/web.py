@@ -0,0 +1,181 @@
+"""Access to web resources, with pooled connections and HTTP caching.
+Previously fetched resources are revalidated using conditional requests.
+The cache is kept in memory, and optionally also in a directory on disk,
+which is set by 'set_cache_dir' or the environment variable CHYSL_HTTP_CACHE.
+"""
+
+import contextlib
+import hashlib
+import http
+import io
+import json
+import os
+import pathlib
+import threading
+
+import cache
+import constants
+
+# The HTTP session for each thread; sessions are not safe to share.
+_local = threading.local()
+
+# Cached responses in memory, keyed by URL.
+_responses = cache.LRUCache(constants.WEB_CACHE_SIZE)
+
+# Directory for the on-disk cache, if any.
+_cache_dir = None
+
+
+def set_cache_dir(dirpath):
+    "Set the directory for the on-disk HTTP cache, creating it if necessary."
+    global _cache_dir
+    if dirpath:
+        _cache_dir = pathlib.Path(dirpath)
+        _cache_dir.mkdir(parents=True, exist_ok=True)
+    else:
+        _cache_dir = None
+
+
+def get_cache_dir():
+    "Return the directory for the on-disk HTTP cache, or None if not set."
+    return _cache_dir
+
+
+def get_session():
+    "Return the HTTP session for the current thread. Connections are pooled."
+    try:
+        return _local.session
+    except AttributeError:
+        import requests  # Deferred, since it takes time to import.
+
+        _local.session = session = requests.Session()
+        session.headers["User-Agent"] = f"Chysl/{constants.__version__}"
+        return session
+
+
+def fetch(url, stream=False):
+    """Request the web resource given by the URL. If the resource is in the
+    cache, make a conditional request. Return a tuple of the cached entry,
+    if the server replies that it has not been modified, else None, and the
+    response. Raises ValueError if the resource could not be fetched.
+    """
+    entry = _responses.get(url) or read_entry(url)
+    headers = {}
+    if entry:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+    session = get_session()
+    import requests.exceptions  # Deferred; already imported by 'get_session'.
+
+    try:
+        response = session.get(url, headers=headers, stream=stream)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as error:
+        raise ValueError(str(error))
+    if entry and response.status_code == http.HTTPStatus.NOT_MODIFIED:
+        return entry, response
+    return None, response
+
+
+def get(url):
+    """Get the text content of the web resource given by the URL.
+    If the resource is in the cache, make a conditional request, and use
+    the cached content if the server replies that it has not been modified.
+    Return a tuple of the text and the validator (ETag or Last-Modified) of
+    the resource, or None if the server provided neither.
+    Raises ValueError if the resource could not be fetched.
+    """
+    entry, response = fetch(url)
+    if entry is None:
+        entry = dict(
+            url=url,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            text=response.text,
+        )
+        # Only a resource that can be revalidated is worth caching.
+        if entry["etag"] or entry["last_modified"]:
+            write_entry(entry)
+    if entry["etag"] or entry["last_modified"]:
+        _responses.set(url, entry)
+    return entry["text"], entry["etag"] or entry["last_modified"]
+
+
+@contextlib.contextmanager
+def stream(url):
+    """Context for reading the web resource given by the URL as a text stream,
+    without holding its entire content in memory. If the resource is in the
+    cache, make a conditional request, and stream the cached content if the
+    server replies that it has not been modified. Content streamed from the
+    server is not cached. Yields a tuple of the text stream, the validator
+    (ETag or Last-Modified) of the resource, or None if the server provided
+    neither, and the size of the content in bytes, or None if not known.
+    Raises ValueError if the resource could not be fetched.
+    """
+    entry, response = fetch(url, stream=True)
+    try:
+        if entry:
+            infile = io.StringIO(entry["text"])
+            validator = entry["etag"] or entry["last_modified"]
+            size = len(entry["text"].encode("utf-8"))
+        else:
+            response.raw.decode_content = True  # Undo any gzip content coding.
+            response.raw.auto_close = False  # Closed with the response.
+            infile = io.TextIOWrapper(
+                response.raw, encoding=response.encoding or "utf-8", newline=""
+            )
+            validator = response.headers.get("ETag") or response.headers.get(
+                "Last-Modified"
+            )
+            # The length of content coded by e.g. gzip is not the size of the text.
+            try:
+                if response.headers.get("Content-Encoding", "identity") != "identity":
+                    raise ValueError
+                size = int(response.headers["Content-Length"])
+            except (KeyError, ValueError):
+                size = None
+        yield infile, validator, size
+    finally:
+        response.close()
+
+
+def clear():
+    "Remove all cached responses from memory and from the on-disk cache."
+    _responses.clear()
+    if _cache_dir:
+        for filepath in _cache_dir.glob("*.json"):
+            filepath.unlink(missing_ok=True)
+
+
+def get_entry_path(url):
+    "Return the path of the file for the URL in the on-disk cache."
+    return _cache_dir / (hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+
+def read_entry(url):
+    "Return the cached response for the URL from the on-disk cache, if any."
+    if not _cache_dir:
+        return None
+    try:
+        with open(get_entry_path(url), encoding="utf-8") as infile:
+            entry = json.load(infile)
+    except (OSError, ValueError):
+        return None
+    if entry.get("url") != url:
+        return None
+    return entry
+
+
+def write_entry(entry):
+    "Write the response into the on-disk cache. Failures are ignored."
+    if not _cache_dir:
+        return
+    try:
+        cache.write_file(get_entry_path(entry["url"]), json.dumps(entry))
+    except OSError:
+        pass
+
+
+set_cache_dir(os.environ.get("CHYSL_HTTP_CACHE"))